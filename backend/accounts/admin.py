@@ -1,5 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User
+from .models import OutboundEmail, User
 
 admin.site.register(User, UserAdmin)
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'created_at', 'attempts', 'sent_at')
+    list_filter = ('sent_at',)
+    readonly_fields = ('created_at',)
@@ -0,0 +1,103 @@
+"""
+Outbox for account emails. Views only insert an OutboundEmail row, so the
+response does not wait on (or reveal timing of) SMTP; send_pending delivers
+due rows in batches over one connection and retries failures with
+exponential backoff.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from .models import OutboundEmail
+
+
+def enqueue_email(subject, body, to, from_email=None):
+    """
+    Adds an email to the outbox. With EMAIL_SEND_ASYNC off the outbox is
+    drained as soon as the surrounding transaction commits.
+    """
+    return enqueue_emails([(subject, body, to)], from_email)[0]
+
+
+def enqueue_emails(emails, from_email=None):
+    """enqueue_email for many (subject, body, to) tuples in one insert."""
+    now = timezone.now()
+    created = OutboundEmail.objects.bulk_create([
+        OutboundEmail(
+            subject=subject,
+            body=body,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            to=list(to),
+            next_attempt_at=now,
+        )
+        for subject, body, to in emails
+    ])
+    if created and not settings.EMAIL_SEND_ASYNC:
+        transaction.on_commit(send_pending)
+    return created
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt after `attempts` failures."""
+    return timedelta(seconds=settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+def claim_due(limit, lease):
+    """
+    Claims up to `limit` due emails by pushing their next attempt `lease`
+    into the future, so concurrent workers skip them and a crashed worker's
+    rows come back once the lease runs out.
+    """
+    now = timezone.now()
+    claimed = []
+    with transaction.atomic():
+        due = OutboundEmail.objects.filter(
+            sent_at__isnull=True,
+            next_attempt_at__lte=now,
+            attempts__lt=settings.EMAIL_MAX_ATTEMPTS,
+        ).order_by('next_attempt_at', 'id')[:limit]
+        for email in due:
+            # Conditional on the value read, otherwise another worker got it first
+            if OutboundEmail.objects.filter(id=email.id, next_attempt_at=email.next_attempt_at).update(next_attempt_at=now + lease):
+                claimed.append(email)
+    return claimed
+
+
+def send_pending(limit=100, lease=timedelta(minutes=5)):
+    """
+    Sends up to `limit` due emails over one connection. Sent rows are marked
+    with one UPDATE; failed rows are rescheduled with backoff until
+    EMAIL_MAX_ATTEMPTS. Returns (sent, failed) counts.
+    """
+    emails = claim_due(limit, lease)
+    if not emails:
+        return 0, 0
+
+    sent_ids = []
+    failed = []
+    connection = get_connection(fail_silently=False)
+    try:
+        for email in emails:
+            message = EmailMessage(email.subject, email.body, email.from_email, email.to, connection=connection)
+            try:
+                connection.open()  # No-op while the connection is up
+                connection.send_messages([message])
+            except Exception as e:
+                failed.append((email, e))
+                # The connection may be broken; the next message reconnects
+                connection.close()
+            else:
+                sent_ids.append(email.id)
+    finally:
+        connection.close()
+
+    now = timezone.now()
+    OutboundEmail.objects.filter(id__in=sent_ids).update(sent_at=now, last_error='')
+    for email, error in failed:
+        email.attempts += 1
+        email.last_error = f"{type(error).__name__}: {error}"
+        email.next_attempt_at = now + retry_delay(email.attempts)
+    OutboundEmail.objects.bulk_update([email for email, _ in failed], ['attempts', 'last_error', 'next_attempt_at'])
+    return len(sent_ids), len(failed)
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from accounts.mail import send_pending
+
+
+class Command(BaseCommand):
+    help = "Delivers queued account emails, one SMTP connection per batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Send what is due and exit instead of polling.")
+        parser.add_argument('--batch-size', type=int, default=100, help="Emails sent per connection.")
+        parser.add_argument('--sleep', type=float, default=5.0, help="Seconds to wait when nothing is due.")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        try:
+            while True:
+                sent, failed = send_pending(limit=options['batch_size'])
+                if sent or failed:
+                    total_sent += sent
+                    total_failed += failed
+                    self.stdout.write(f"Sent {sent} emails, {failed} failed and rescheduled")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Email worker finished: {total_sent} sent, {total_failed} failed"))
@@ -11,3 +11,32 @@ class User(AbstractUser):
 
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
+
+class OutboundEmail(models.Model):
+    """
+    Email waiting in the outbox. Rows are sent in batches over one SMTP
+    connection by the run_email_worker command (see accounts.mail) and kept
+    afterwards with sent_at set.
+    """
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Due time of the next delivery attempt; pushed out while a worker holds the row
+    next_attempt_at = models.DateTimeField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Pending rows only: the sent history never slows down the poll
+            models.Index(
+                fields=['next_attempt_at'], name='outbox_pending_due_idx', condition=models.Q(sent_at__isnull=True)
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.to)}"
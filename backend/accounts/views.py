@@ -3,11 +3,10 @@ from rest_framework.response import Response
 from django.contrib.auth import login, logout, authenticate, get_user_model
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import ensure_csrf_cookie
-from django.core.mail import send_mail
-from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
+from .mail import enqueue_email
 from .serializers import UserSerializer
 
 User = get_user_model()
@@ -61,13 +60,7 @@ class ForgotUsernameView(views.APIView):
         if users.exists():
             usernames = [user.username for user in users]
             message = f"Hello,\n\nYour registered username(s) on SmallJobs: {', '.join(usernames)}\n\nLogin here: http://localhost:5173/login"
-            send_mail(
-                'Your SmallJobs Username',
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [email],
-                fail_silently=False,
-            )
+            enqueue_email('Your SmallJobs Username', message, [email])
         
         # Always return success to prevent email enumeration
         return Response({'success': 'If an account exists with this email, we have sent the username(s).'})
@@ -88,13 +81,7 @@ class ForgotPasswordView(views.APIView):
             
             message = f"Hello {user.username},\n\nYou requested a password reset for your SmallJobs account.\nClick the link below to reset it:\n\n{reset_link}\n\nIf you didn't request this, please ignore this email."
             
-            send_mail(
-                'Reset Your SmallJobs Password',
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [email],
-                fail_silently=False,
-            )
+            enqueue_email('Reset Your SmallJobs Password', message, [email])
         except User.DoesNotExist:
             pass
         
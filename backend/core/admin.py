@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Skill, UserProfile, JobPost, Match
+from .models import Skill, UserProfile, JobPost, Match, MatchTask, UnreadCounter
 
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
@@ -9,3 +9,5 @@ class SkillAdmin(admin.ModelAdmin):
 admin.site.register(UserProfile)
 admin.site.register(JobPost)
 admin.site.register(Match)
+admin.site.register(MatchTask)
+admin.site.register(UnreadCounter)
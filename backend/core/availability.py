@@ -0,0 +1,131 @@
+"""
+Compact form of the availability/requirements JSON used by the matcher.
+
+{"months": [...], "days": [...], "time_slots": [{"start": "HH:MM", "end": "HH:MM"}]}
+compiles to {"months": int, "days": int, "slots": [[start, end], ...]} where
+months/days are bitmasks and slots are minutes since midnight. This is done
+once on save, so the per-pair hard checks are bitwise ANDs and integer
+comparisons.
+"""
+
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+DAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+MONTH_BITS = {name: 1 << i for i, name in enumerate(MONTHS)}
+DAY_BITS = {name: 1 << i for i, name in enumerate(DAYS)}
+
+
+def time_to_minutes(t_str):
+    try:
+        h, m = map(int, t_str.split(':'))
+        return h * 60 + m
+    except (ValueError, AttributeError, TypeError):
+        return None
+
+
+def compile_mask(items, bits):
+    """
+    Returns the bitmask for items. Values outside the vocabulary can't be
+    represented, so those lists are kept as sorted lowercase names instead.
+    """
+    names = {str(item).lower() for item in items}
+    if names.issubset(bits):
+        mask = 0
+        for name in names:
+            mask |= bits[name]
+        return mask
+    return sorted(names)
+
+
+def compile_slots(slots):
+    """
+    Converts time slots to [start, end] minute pairs. Slots missing a start
+    or end are skipped; those with an unparseable time become None, which
+    never contains or fits anything.
+    """
+    compiled = []
+    for slot in slots:
+        if not isinstance(slot, dict) or slot.get('start') is None or slot.get('end') is None:
+            continue
+        start = time_to_minutes(slot.get('start'))
+        end = time_to_minutes(slot.get('end'))
+        compiled.append(None if start is None or end is None else [start, end])
+    return compiled
+
+
+def compile_schedule(data):
+    data = data or {}
+    # Keys may be present but null
+    return {
+        'months': compile_mask(data.get('months') or [], MONTH_BITS),
+        'days': compile_mask(data.get('days') or [], DAY_BITS),
+        'slots': compile_slots(data.get('time_slots') or []),
+    }
+
+
+def _names(value, bits):
+    if isinstance(value, int):
+        return {name for name, bit in bits.items() if value & bit}
+    return set(value)
+
+
+def mask_contains(required, available, bits):
+    """
+    Same rule as utils.check_containment: an empty requirement fits anything
+    and an empty availability is treated as flexible.
+    """
+    if not required or not available:
+        return True
+    if isinstance(required, int) and isinstance(available, int):
+        return required & available == required
+    return _names(required, bits).issubset(_names(available, bits))
+
+
+def interval_contained(j_s, j_e, s_s, s_e):
+    """
+    Checks if the job interval fits within the seeker interval, handling
+    24h wrap-around. An interval wraps if its end is less than or equal to
+    its start (e.g., 5 PM to 1 AM).
+    """
+    j_wraps = j_e <= j_s
+    s_wraps = s_e <= s_s
+
+    # Case 1: Neither wraps. Simple subset check.
+    if not j_wraps and not s_wraps:
+        return j_s >= s_s and j_e <= s_e
+
+    # Case 2: Job wraps but Seeker doesn't. Impossible to fit.
+    if j_wraps and not s_wraps:
+        return False
+
+    # Case 3: Job doesn't wrap, but Seeker does (e.g., job 1am-3am, seeker 11pm-5am)
+    if not j_wraps and s_wraps:
+        # Job must be entirely in the first part (after s_s) or second part (before s_e)
+        return j_s >= s_s or j_e <= s_e
+
+    # Case 4: Both wrap. Both cross midnight.
+    return j_s >= s_s and j_e <= s_e
+
+
+def schedule_fits(req, avail):
+    """
+    Hard months/days/time-slot checks between a compiled job requirement
+    and a compiled seeker availability.
+    """
+    if not mask_contains(req['months'], avail['months'], MONTH_BITS):
+        return False
+    if not mask_contains(req['days'], avail['days'], DAY_BITS):
+        return False
+
+    # All job slots must fit within at least one seeker slot
+    job_slots = req['slots']
+    if job_slots:
+        seeker_slots = avail['slots']
+        if not seeker_slots:
+            return False # Job requires specific times, seeker specified none
+        for j_slot in job_slots:
+            if j_slot is None:
+                return False
+            if not any(s_slot is not None and interval_contained(*j_slot, *s_slot) for s_slot in seeker_slots):
+                return False # This job slot doesn't fit anywhere in seeker's schedule
+    return True
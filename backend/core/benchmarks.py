@@ -0,0 +1,573 @@
+"""
+Scenarios for `python manage.py benchmark <scenario>`.
+
+Each scenario builds its own fixture rows inside a transaction that is
+rolled back at the end, so it can run against a development database.
+"""
+import asyncio
+import random
+import statistics
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from accounts.models import User
+from .availability import DAYS, MONTHS
+from .events import get_broker, publish_to_users, stream_events
+from .geo import grid_cell, haversine_km, within_radius
+from .messaging import get_or_create_direct_conversation
+from .models import Application, Conversation, Match, Skill, UserProfile, JobPost
+from .search import LikeJobSearch, job_search
+from .utils import SeekerMatrix, calculate_match_score, check_containment, is_slot_contained, update_matches_for_job
+
+SCENARIOS = {}
+
+CITIES = ['Mumbai', 'Pune', 'Delhi', 'Bengaluru', 'Chennai', 'Hyderabad']
+
+WORDS = [
+    'cook', 'waiter', 'driver', 'cleaner', 'helper', 'cashier', 'delivery', 'packing', 'warehouse', 'event',
+    'catering', 'security', 'reception', 'painter', 'plumber', 'electrician', 'gardener', 'tutor', 'nanny', 'tailor',
+    'kitchen', 'shift', 'weekend', 'urgent', 'experienced', 'fresher', 'morning', 'evening', 'night', 'daily',
+    'restaurant', 'hotel', 'office', 'shop', 'store', 'site', 'school', 'hospital', 'mall', 'factory',
+]
+
+
+def scenario(func):
+    SCENARIOS[func.__name__.replace('_', '-')] = func
+    return func
+
+
+class Rollback(Exception):
+    pass
+
+
+def run(name, out, size, seed):
+    """Runs a scenario and discards everything it wrote."""
+    try:
+        with transaction.atomic():
+            SCENARIOS[name](out, size, random.Random(seed))
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def random_schedule(rng):
+    """
+    Random availability/requirements, including the odd value outside the
+    month/day vocabulary and unparseable slot so fallback paths get exercised.
+    """
+    def pick(items):
+        picked = [item.title() for item in rng.sample(items, rng.randint(0, len(items)))]
+        if rng.random() < 0.02:
+            picked.append('Weekend')
+        return picked
+
+    slots = []
+    for _ in range(rng.choice([0, 0, 1, 2])):
+        start = rng.randrange(0, 24 * 60, 30)
+        end = rng.randrange(0, 24 * 60, 30)
+        slots.append({'start': f"{start // 60:02d}:{start % 60:02d}", 'end': f"{end // 60:02d}:{end % 60:02d}"})
+    if rng.random() < 0.02:
+        slots.append({'start': 'noon', 'end': '14:00'})
+    return {'months': pick(MONTHS), 'days': pick(DAYS), 'time_slots': slots}
+
+
+def create_fixtures(rng, seekers, jobs, skills=20):
+    """
+    Creates seekers and active jobs with random cities, skills, schedules
+    and pay. Returns (profiles, jobs) with skills prefetched.
+    """
+    skill_objs = [Skill.objects.create(name=f"BENCH SKILL {i}") for i in range(skills)]
+    business = User.objects.create(username='bench-business', email='bench-business@example.com', role=User.Role.BUSINESS)
+
+    for i in range(seekers):
+        user = User.objects.create(username=f"bench-seeker-{i}", email=f"bench-seeker-{i}@example.com")
+        profile = UserProfile.objects.create(
+            user=user,
+            location=rng.choice(CITIES),
+            locations=rng.sample(CITIES, rng.randint(0, 2)),
+            availability=random_schedule(rng),
+            min_pay=rng.choice([None, 300, 600]),
+            max_pay=rng.choice([None, 800, 1500]),
+        )
+        profile.skills.set(rng.sample(skill_objs, rng.randint(0, 4)))
+
+    for i in range(jobs):
+        job = JobPost.objects.create(
+            business=business,
+            title=f"Bench job {i}",
+            description="Benchmark fixture",
+            location=rng.choice(CITIES),
+            requirements=random_schedule(rng),
+            pay_per_day=rng.choice([None, 400, 700, 1000]),
+        )
+        job.required_skills.set(rng.sample(skill_objs, rng.randint(0, 3)))
+
+    profiles = list(UserProfile.objects.filter(user__username__startswith='bench-seeker-').prefetch_related('skills'))
+    job_list = list(JobPost.objects.filter(business=business).prefetch_related('required_skills'))
+    return profiles, job_list
+
+
+def legacy_calculate_match_score(job, profile):
+    """
+    calculate_match_score as it was before schedules were compiled,
+    kept as the baseline for the scoring benchmark.
+    """
+    job_city = job.location.strip().lower()
+    seeker_cities = [loc.strip().lower() for loc in (profile.locations or [])]
+    if profile.location:
+        seeker_cities.append(profile.location.strip().lower())
+    if job_city not in seeker_cities:
+        return 0.0
+
+    job_skills = set(job.required_skills.all())
+    profile_skills = set(profile.skills.all())
+    if job_skills:
+        intersection = job_skills.intersection(profile_skills)
+        if not intersection:
+            return 0.0
+    else:
+        intersection = set()
+
+    job_req = job.requirements or {}
+    profile_avail = profile.availability or {}
+    req_months = job_req.get('months', [])
+    if req_months and not check_containment(req_months, profile_avail.get('months', [])):
+        return 0.0
+    req_days = job_req.get('days', [])
+    if req_days and not check_containment(req_days, profile_avail.get('days', [])):
+        return 0.0
+
+    job_slots = job_req.get('time_slots', [])
+    seeker_slots = profile_avail.get('time_slots', [])
+    if job_slots:
+        if not seeker_slots:
+            return 0.0
+        for j_slot in job_slots:
+            if not any(is_slot_contained(j_slot, s_slot) for s_slot in seeker_slots):
+                return 0.0
+
+    score = 10.0 + len(intersection) * 5
+    if job.pay_per_day:
+        if profile.min_pay and job.pay_per_day >= profile.min_pay:
+            score += 5
+        if profile.max_pay and job.pay_per_day <= profile.max_pay:
+            score += 2
+    return score
+
+
+def score_all(scorer, jobs, profiles):
+    return [scorer(job, profile) for job in jobs for profile in profiles]
+
+
+@scenario
+def scoring(out, size, rng):
+    """Legacy vs compiled calculate_match_score over `size` job x seeker pairs."""
+    seekers = max(1, int(size ** 0.5))
+    profiles, jobs = create_fixtures(rng, seekers, max(1, size // seekers))
+    pairs = len(profiles) * len(jobs)
+    # Same city for everyone so every pair reaches the schedule checks
+    for obj in [*profiles, *jobs]:
+        obj.location = CITIES[0]
+
+    legacy, legacy_time = timed(score_all, legacy_calculate_match_score, jobs, profiles)
+    compiled, compiled_time = timed(score_all, calculate_match_score, jobs, profiles)
+
+    out.write(f"{pairs} pairs, {sum(1 for s in compiled if s)} matches")
+    out.write(f"legacy:   {legacy_time:.3f}s ({legacy_time / pairs * 1e6:.2f} us/pair)")
+    out.write(f"compiled: {compiled_time:.3f}s ({compiled_time / pairs * 1e6:.2f} us/pair)")
+    out.write(f"speedup:  {legacy_time / compiled_time:.2f}x, results identical: {legacy == compiled}")
+
+
+@scenario
+def batch_scoring(out, size, rng):
+    """
+    Scalar calculate_match_score vs SeekerMatrix over `size` pairs, checking
+    both give exactly the same score for every pair.
+    """
+    seekers = max(1, int(size ** 0.5))
+    profiles, jobs = create_fixtures(rng, seekers, max(1, size // seekers))
+    pairs = len(profiles) * len(jobs)
+    for obj in [*profiles, *jobs]:
+        obj.location = rng.choice(CITIES[:2])
+
+    scalar, scalar_time = timed(score_all, calculate_match_score, jobs, profiles)
+    matrix, build_time = timed(SeekerMatrix, profiles)
+    batch, batch_time = timed(lambda: [float(score) for job in jobs for score in matrix.score(job)])
+
+    mismatches = sum(1 for a, b in zip(scalar, batch) if a != b)
+    out.write(f"{pairs} pairs, {sum(1 for s in batch if s)} matches")
+    out.write(f"scalar:     {scalar_time:.3f}s ({scalar_time / pairs * 1e6:.2f} us/pair)")
+    out.write(f"matrix:     {build_time:.3f}s to build {len(matrix)} rows")
+    out.write(f"vectorized: {batch_time:.3f}s ({batch_time / pairs * 1e6:.2f} us/pair)")
+    out.write(f"mismatched pairs: {mismatches}")
+
+
+@scenario
+def events(out, size, rng):
+    """
+    Holds `size` idle event-stream subscribers (the generator behind
+    api/events/), then publishes from a request-like thread and measures
+    memory per connection and delivery latency.
+    """
+    async def run_streams():
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        streams = [stream_events(user_id, heartbeat=3600) for user_id in range(size)]
+        for stream in streams:
+            await anext(stream) # Past the retry line, now waiting on the queue
+        held = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        out.write(f"{get_broker().connection_count()} idle connections, {held / size / 1024:.2f} KiB each")
+
+        samples = min(size, 1000)
+        latencies = []
+        for user_id in rng.sample(range(size), samples):
+            pending = asyncio.ensure_future(anext(streams[user_id]))
+            sent = time.perf_counter()
+            threading.Thread(target=publish_to_users, args=([user_id], {'type': 'ping', 'sent': sent})).start()
+            await pending
+            latencies.append(time.perf_counter() - sent)
+
+        for stream in streams:
+            await stream.aclose()
+        latencies.sort()
+        out.write(
+            f"delivery over {samples} events: p50 {statistics.median(latencies) * 1e3:.3f} ms, "
+            f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1e3:.3f} ms"
+        )
+
+    asyncio.run(run_streams())
+
+
+@scenario
+def conversations(out, size, rng):
+    """
+    Direct-conversation lookup among `size` two-party conversations:
+    the old double participant join vs the direct_key unique index.
+    """
+    users = 2
+    while users * (users - 1) // 2 < size:
+        users += 1
+    User.objects.bulk_create(
+        [User(username=f"bench-chat-{i}", email=f"bench-chat-{i}@example.com") for i in range(users)],
+        batch_size=5000,
+    )
+    user_objs = list(User.objects.filter(username__startswith='bench-chat-').order_by('id'))
+
+    pairs = []
+    for i in range(users):
+        for j in range(i + 1, users):
+            pairs.append((user_objs[i], user_objs[j]))
+            if len(pairs) == size:
+                break
+        if len(pairs) == size:
+            break
+
+    started = time.perf_counter()
+    Conversation.objects.bulk_create(
+        [Conversation(direct_key=f"{a.id}:{b.id}") for a, b in pairs], batch_size=5000
+    )
+    ids = dict(Conversation.objects.filter(direct_key__isnull=False).values_list('direct_key', 'id'))
+    Through = Conversation.participants.through
+    for i in range(0, len(pairs), 50000):
+        Through.objects.bulk_create(
+            [Through(conversation_id=ids[f"{a.id}:{b.id}"], user_id=user.id)
+             for a, b in pairs[i:i + 50000] for user in (a, b)],
+            batch_size=5000,
+        )
+    out.write(f"{len(pairs)} conversations among {users} users created in {time.perf_counter() - started:.1f}s")
+
+    sample = rng.sample(pairs, min(len(pairs), 1000))
+
+    def legacy_lookup():
+        for a, b in sample:
+            qs = Conversation.objects.filter(participants=a).filter(participants=b)
+            if qs.exists():
+                qs.first()
+
+    def keyed_lookup():
+        for a, b in sample:
+            get_or_create_direct_conversation(a, b)
+
+    _, legacy_time = timed(legacy_lookup)
+    _, keyed_time = timed(keyed_lookup)
+    out.write(f"double join: {legacy_time / len(sample) * 1e3:.3f} ms/lookup")
+    out.write(f"direct_key:  {keyed_time / len(sample) * 1e3:.3f} ms/lookup")
+
+
+@scenario
+def search(out, size, rng):
+    """
+    Job search over `size` active jobs: the old title/description
+    icontains scan vs the full-text index, filtered and relevance-ordered.
+    """
+    skill_objs = [Skill.objects.create(name=f"BENCH {word.upper()}") for word in WORDS[:20]]
+    business = User.objects.create(username='bench-business', email='bench-business@example.com', role=User.Role.BUSINESS)
+
+    started = time.perf_counter()
+    batch = 10000
+    Through = JobPost.required_skills.through
+    for offset in range(0, size, batch):
+        jobs = JobPost.objects.bulk_create([
+            JobPost(
+                business=business,
+                title=' '.join(rng.sample(WORDS, 3)).title(),
+                description=' '.join(rng.choice(WORDS) for _ in range(rng.randint(10, 40))),
+                location=rng.choice(CITIES),
+                pay_per_day=rng.randrange(300, 2000, 50),
+            )
+            for _ in range(min(batch, size - offset))
+        ])
+        Through.objects.bulk_create([
+            Through(jobpost_id=job.id, skill_id=skill.id) for job in jobs for skill in rng.sample(skill_objs, 2)
+        ])
+    out.write(f"{size} jobs created in {time.perf_counter() - started:.1f}s")
+
+    backend = job_search()
+    count, index_time = timed(backend.rebuild)
+    out.write(f"{type(backend).__name__}: indexed {count} jobs in {index_time:.1f}s")
+
+    queries = ['cook', 'night shift', 'warehouse packing', 'elect', 'hotel kitchen urgent']
+    active = JobPost.objects.filter(is_active=True)
+    legacy = LikeJobSearch()
+
+    def first_page(qs):
+        return list(qs.values_list('id', flat=True)[:20])
+
+    for query in queries:
+        _, legacy_time = timed(lambda: first_page(legacy.filter(active, query).order_by('-created_at')))
+        hits, indexed_time = timed(lambda: backend.filter(active, query).count())
+        _, page_time = timed(lambda: first_page(backend.filter(active, query).order_by('-created_at')))
+        _, ranked_time = timed(lambda: first_page(backend.order_by_relevance(backend.filter(active, query), query)))
+        out.write(
+            f"{query!r:24} {hits:>8} hits  icontains {legacy_time * 1e3:8.1f} ms  "
+            f"index {page_time * 1e3:8.1f} ms  count {indexed_time * 1e3:8.1f} ms  relevance {ranked_time * 1e3:8.1f} ms"
+        )
+
+
+@scenario
+def geo(out, size, rng):
+    """
+    Radius search over `size` jobs spread around India: haversine over
+    every row vs the grid-cell prefilter with haversine refinement.
+    """
+    business = User.objects.create(username='bench-business', email='bench-business@example.com', role=User.Role.BUSINESS)
+    started = time.perf_counter()
+    batch = 10000
+    for offset in range(0, size, batch):
+        jobs = []
+        for _ in range(min(batch, size - offset)):
+            lat, lng = rng.uniform(8, 32), rng.uniform(68, 90)
+            jobs.append(JobPost(
+                business=business, title='Bench job', description='', location=rng.choice(CITIES),
+                latitude=lat, longitude=lng, geo_cell=grid_cell(lat, lng), pay_per_day=500,
+            ))
+        JobPost.objects.bulk_create(jobs)
+    out.write(f"{size} jobs created in {time.perf_counter() - started:.1f}s")
+
+    jobs = JobPost.objects.filter(is_active=True)
+    for lat, lng, radius_km in [(19.07, 72.88, 5), (18.52, 73.86, 25), (12.97, 77.59, 100)]:
+        full_scan = jobs.annotate(distance_km=haversine_km(lat, lng)).filter(distance_km__lte=radius_km)
+        scanned, scan_time = timed(full_scan.count)
+        found, grid_time = timed(within_radius(jobs, lat, lng, radius_km).count)
+        assert scanned == found
+        out.write(
+            f"{radius_km:>4} km: {found:>7} jobs  full scan {scan_time * 1e3:9.1f} ms  "
+            f"grid prefilter {grid_time * 1e3:8.1f} ms"
+        )
+
+
+def request_latencies(view, user, params, repeat, path='/api/jobs/'):
+    """Sorted wall times of `repeat` GET requests to a list view."""
+    host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+    factory = APIRequestFactory()
+    times = []
+    for _ in range(repeat):
+        request = factory.get(path, params, HTTP_HOST=host)
+        force_authenticate(request, user)
+        response, elapsed = timed(view, request)
+        assert response.status_code == 200, response.data
+        times.append(elapsed)
+    return sorted(times)
+
+
+@scenario
+def feed(out, size, rng):
+    """
+    Seeker job feed over `size` jobs, through the view: page-number pages at
+    increasing depth vs keyset pages at the same depth, and the skills
+    filter as join + DISTINCT vs EXISTS.
+    """
+    from .pagination import KeysetPagination
+    from .views import JobPostViewSet
+
+    skill_objs = [Skill.objects.create(name=f"BENCH SKILL {i}") for i in range(20)]
+    business = User.objects.create(username='bench-business', email='bench-business@example.com', role=User.Role.BUSINESS)
+    seeker = User.objects.create(username='bench-seeker', email='bench-seeker@example.com', role=User.Role.SEEKER)
+    started = time.perf_counter()
+    batch = 10000
+    Through = JobPost.required_skills.through
+    for offset in range(0, size, batch):
+        jobs = JobPost.objects.bulk_create([
+            JobPost(
+                business=business, title='Bench job', description='', location=rng.choice(CITIES),
+                pay_per_day=rng.choice([None, *range(300, 2000, 50)]), is_active=rng.random() < 0.9,
+            )
+            for _ in range(min(batch, size - offset))
+        ])
+        Through.objects.bulk_create([
+            Through(jobpost_id=job.id, skill_id=skill.id) for job in jobs for skill in rng.sample(skill_objs, 3)
+        ])
+    out.write(f"{size} jobs created in {time.perf_counter() - started:.1f}s")
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    view = JobPostViewSet.as_view({'get': 'list'})
+    page_size = KeysetPagination.page_size
+    active = JobPost.objects.filter(is_active=True).count()
+
+    def report(label, times):
+        out.write(f"{label:44} p50 {times[len(times) // 2] * 1e3:8.1f} ms  max {times[-1] * 1e3:8.1f} ms")
+
+    for ordering in ('-created_at', 'pay_per_day', '-pay_per_day'):
+        for page in (1, 10, 100, 1000, 10000):
+            if (page - 1) * page_size >= active:
+                break
+            report(f"{ordering} page {page} (offset)", request_latencies(view, seeker, {'ordering': ordering, 'page': page}, 5))
+            params = {'ordering': ordering, 'pagination': 'keyset'}
+            if page > 1:
+                # The cursor a client would hold after paging down to here
+                paginator = KeysetPagination()
+                paginator.field = ordering.lstrip('-')
+                key = F(paginator.field).desc(nulls_last=True) if ordering.startswith('-') else F(paginator.field).asc(nulls_last=True)
+                last = JobPost.objects.filter(is_active=True).order_by(key, '-id' if ordering.startswith('-') else 'id')[(page - 1) * page_size - 1]
+                params['cursor'] = paginator.encode_cursor(last)
+            report(f"{ordering} page {page} (keyset)", request_latencies(view, seeker, params, 5))
+
+    names = ','.join(skill.name for skill in skill_objs[:2])
+    report("skills filter (EXISTS, offset)", request_latencies(view, seeker, {'skills': names}, 5))
+    report("skills filter (EXISTS, keyset)", request_latencies(view, seeker, {'skills': names, 'pagination': 'keyset'}, 5))
+    joined = JobPost.objects.filter(is_active=True, required_skills__name__in=names.split(',')).distinct().order_by('-created_at')
+    times = sorted(timed(lambda: (joined.count(), list(joined[:page_size])))[1] for _ in range(5))
+    report("skills filter (join + DISTINCT, queries only)", times)
+
+
+@scenario
+def top_matches(out, size, rng):
+    """
+    Best 20 matches of a job with `size` matched seekers, and of a seeker
+    matched to every job: matches/?top=20 through the view vs the first
+    paginated page, and the indexed top-20 query vs ranking all of the
+    job's rows in Python.
+    """
+    from .views import MatchViewSet
+
+    business = User.objects.create(username='bench-business', email='bench-business@example.com', role=User.Role.BUSINESS)
+    jobs = JobPost.objects.bulk_create([
+        JobPost(business=business, title=f'Bench job {i}', description='', location=rng.choice(CITIES))
+        for i in range(50)
+    ])
+    popular = jobs[0]
+    started = time.perf_counter()
+    batch = 10000
+    seekers = []
+    for offset in range(0, size, batch):
+        users = User.objects.bulk_create([
+            User(username=f'bench-seeker-{i}', email=f'bench-seeker-{i}@example.com', role=User.Role.SEEKER)
+            for i in range(offset, min(offset + batch, size))
+        ])
+        UserProfile.objects.bulk_create([UserProfile(user=user, location=rng.choice(CITIES)) for user in users])
+        Match.objects.bulk_create([Match(job=popular, seeker=user, score=rng.randint(1, 40)) for user in users])
+        # Thinner matches for the other jobs so the table is not one job only
+        Match.objects.bulk_create([
+            Match(job=job, seeker=user, score=rng.randint(1, 40))
+            for user in users for job in rng.sample(jobs[1:], 2)
+        ])
+        seekers.extend(users)
+    busy = seekers[0]
+    Match.objects.bulk_create(
+        [Match(job=job, seeker=busy, score=rng.randint(1, 40)) for job in jobs], ignore_conflicts=True
+    )
+    out.write(f"{Match.objects.count()} matches created in {time.perf_counter() - started:.1f}s")
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    view = MatchViewSet.as_view({'get': 'list'})
+
+    def report(label, times):
+        out.write(f"{label:44} p50 {times[len(times) // 2] * 1e3:8.1f} ms  max {times[-1] * 1e3:8.1f} ms")
+
+    report("job top=20", request_latencies(view, business, {'job': popular.id, 'top': 20}, 5, '/api/matches/'))
+    report("job top=20 min_score=30", request_latencies(view, business, {'job': popular.id, 'top': 20, 'min_score': 30}, 5, '/api/matches/'))
+    report("job page 1 (paginated, with count)", request_latencies(view, business, {'job': popular.id}, 5, '/api/matches/'))
+    top = Match.objects.filter(job=popular, visible=True).order_by('-score', 'id').values_list('id', 'score')[:20]
+    report("job top 20 off the index (query only)", sorted(timed(lambda: list(top.all()))[1] for _ in range(5)))
+    rows = Match.objects.filter(job=popular, visible=True).values_list('id', 'score')
+    times = sorted(timed(lambda: sorted(rows.all(), key=lambda row: (-row[1], row[0]))[:20])[1] for _ in range(5))
+    report("job all rows ranked in Python (query only)", times)
+    report("seeker top=20", request_latencies(view, busy, {'top': 20}, 5, '/api/matches/'))
+
+
+@scenario
+def accept(out, size, rng):
+    """
+    Accepting one application on each of 20 jobs that have `size` matches
+    and 50 applications: latency and query count of the acceptance request,
+    next to the full rematch of a job that closing it through save() used
+    to trigger.
+    """
+    from .views import ApplicationViewSet
+
+    business = User.objects.create(username='bench-business', email='bench-business@example.com', role=User.Role.BUSINESS)
+    UserProfile.objects.create(user=business, phone_number='0000000000')
+    jobs = JobPost.objects.bulk_create([
+        JobPost(business=business, title=f'Bench job {i}', description='', location=rng.choice(CITIES))
+        for i in range(20)
+    ])
+    started = time.perf_counter()
+    users = User.objects.bulk_create([
+        User(username=f'bench-seeker-{i}', email=f'bench-seeker-{i}@example.com', role=User.Role.SEEKER)
+        for i in range(size)
+    ])
+    UserProfile.objects.bulk_create([UserProfile(user=user, location=rng.choice(CITIES)) for user in users])
+    Match.objects.bulk_create([Match(job=job, seeker=user, score=rng.randint(1, 40)) for job in jobs for user in users])
+    applications = Application.objects.bulk_create([
+        Application(job=job, seeker=user) for job in jobs for user in rng.sample(users, min(50, size))
+    ])
+    out.write(f"{len(jobs) * size} matches created in {time.perf_counter() - started:.1f}s")
+
+    host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+    view = ApplicationViewSet.as_view({'patch': 'partial_update'})
+    factory = APIRequestFactory()
+    times = []
+    queries = []
+    for job in jobs[:-1]:
+        application = next(application for application in applications if application.job_id == job.id)
+        request = factory.patch(f'/api/applications/{application.id}/', {'status': 'ACCEPTED'}, format='json', HTTP_HOST=host)
+        force_authenticate(request, business)
+        with CaptureQueriesContext(connection) as captured:
+            response, elapsed = timed(lambda: view(request, pk=application.id))
+        assert response.status_code == 200, response.data
+        times.append(elapsed)
+        queries.append(len(captured.captured_queries))
+    times.sort()
+    out.write(
+        f"accept: p50 {times[len(times) // 2] * 1e3:.1f} ms  max {times[-1] * 1e3:.1f} ms  "
+        f"queries {min(queries)}-{max(queries)}"
+    )
+
+    job = jobs[-1]
+    _, elapsed = timed(update_matches_for_job, job)
+    out.write(f"rematch of one job (old close path): {elapsed * 1e3:.1f} ms")
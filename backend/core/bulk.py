@@ -0,0 +1,154 @@
+"""
+Bulk job import (CSV or NDJSON) and NDJSON export for businesses.
+
+Imports stream the upload record by record and work in chunks: each chunk
+is validated through JobPostImportSerializer, then its jobs and skill links
+are inserted with one bulk_create each. bulk_create skips JobPost.save()
+and the post_save/m2m_changed signals, so the derived columns, the search
+index and the cached job lists are updated here, and matching is queued
+once for all imported jobs when the transaction commits.
+
+The cached job lists are dropped in the importing process's cache. Run
+from the import_jobs command with the default per-process LocMemCache,
+that leaves running servers' cached feeds as they were until
+RESPONSE_CACHE_TIMEOUT; configure a shared cache (see CACHES in settings)
+when importing from the command line.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.utils.encoders import JSONEncoder
+from .models import JobPost, Skill
+from .response_cache import invalidate_job_lists
+from .search import job_search
+from .serializers import CreatableSlugRelatedField, JobPostSerializer
+from .tasks import mark_jobs_dirty
+
+FORMATS = ('csv', 'ndjson')
+CHUNK_SIZE = 500
+MAX_ERRORS = 50
+
+
+class JobImportError(Exception):
+    """Raised with the per-record errors when an import is rejected."""
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid records")
+        self.errors = errors
+
+
+class JobPostImportSerializer(JobPostSerializer):
+    # Names are resolved for a whole chunk at once in import_jobs
+    required_skills = serializers.ListField(child=serializers.CharField(max_length=100), required=False)
+
+
+def detect_format(name, content_type=''):
+    if name.lower().endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    if name.lower().endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type:
+        return 'ndjson'
+    return None
+
+
+def read_records(stream, file_format):
+    """
+    Yields (line number, record dict) from a binary stream. CSV cells that
+    are empty are left out; required_skills is comma separated and
+    requirements is JSON. Unparseable lines yield a string error instead.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            record = {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+            if 'required_skills' in record:
+                record['required_skills'] = [name.strip() for name in record['required_skills'].split(',') if name.strip()]
+            if 'requirements' in record:
+                try:
+                    record['requirements'] = json.loads(record['requirements'])
+                except ValueError:
+                    yield reader.line_num, 'requirements is not valid JSON'
+                    continue
+            yield reader.line_num, record
+    else:
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_number, 'not valid JSON'
+                continue
+            yield line_number, record if isinstance(record, dict) else 'not a JSON object'
+
+
+def import_jobs(business, records, chunk_size=CHUNK_SIZE):
+    """
+    Creates jobs for `business` from (line number, record) pairs. All or
+    nothing: invalid records raise JobImportError with up to MAX_ERRORS
+    {'line', 'errors'} entries once the input is exhausted. Returns the
+    number of jobs created.
+    """
+    skill_field = CreatableSlugRelatedField(slug_field='name', queryset=Skill.objects.all())
+    errors = []
+    created_ids = []
+    records = iter(records)
+    with transaction.atomic():
+        while chunk := list(islice(records, chunk_size)):
+            valid = []
+            for line_number, record in chunk:
+                serializer = JobPostImportSerializer(data=record) if isinstance(record, dict) else None
+                if serializer is not None and serializer.is_valid():
+                    valid.append(serializer.validated_data)
+                elif len(errors) < MAX_ERRORS:
+                    errors.append({'line': line_number, 'errors': serializer.errors if serializer else record})
+                else:
+                    break
+            # Once anything failed the import is rejected; only keep validating
+            if errors or not valid:
+                continue
+            created_ids.extend(_create_chunk(business, valid, skill_field))
+
+        if errors:
+            raise JobImportError(errors)
+
+        job_search().index_jobs(created_ids)
+        invalidate_job_lists(business.id)
+        mark_jobs_dirty(created_ids) # Flushed as one batch on commit
+    return len(created_ids)
+
+
+def _create_chunk(business, rows, skill_field):
+    jobs = []
+    for data in rows:
+        data = dict(data)
+        data.pop('required_skills', None)
+        job = JobPost(business=business, **data)
+        job.compile_fields()
+        jobs.append(job)
+    JobPost.objects.bulk_create(jobs)
+
+    names = [name for data in rows for name in data.get('required_skills', [])]
+    skills = {skill.name: skill for skill in skill_field.resolve_many(names)} if names else {}
+    Through = JobPost.required_skills.through
+    Through.objects.bulk_create([
+        Through(jobpost_id=job.id, skill_id=skill_id)
+        for job, data in zip(jobs, rows)
+        for skill_id in {skills[name.upper()].id for name in data.get('required_skills', [])}
+    ])
+    return [job.id for job in jobs]
+
+
+def export_jobs(business, chunk_size=CHUNK_SIZE):
+    """
+    Yields the business's jobs as NDJSON lines, in the import format, reading
+    chunk_size rows at a time.
+    """
+    jobs = JobPost.objects.filter(business=business).select_related('business').prefetch_related(
+        'required_skills'
+    ).order_by('id')
+    for job in jobs.iterator(chunk_size=chunk_size):
+        yield json.dumps(JobPostSerializer(job).data, cls=JSONEncoder) + '\n'
@@ -0,0 +1,115 @@
+"""
+Pub/sub used to push chat events (new messages, read receipts, unread
+counts) to connected clients over the server-sent events endpoint.
+
+Every user has one channel. The default broker keeps subscribers in process
+memory, which covers a single ASGI process; EVENTS_BROKER can point at any
+class with the same subscribe/publish interface backed by a local broker.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """One connected client: an asyncio queue fed from any thread."""
+    max_pending = 1000
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def deliver(self, event):
+        # A client that stopped reading misses events rather than growing
+        # the queue forever; it resyncs through the REST endpoints.
+        if self.queue.qsize() < self.max_pending:
+            self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InMemoryBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel, event):
+        """Safe to call from request threads; delivery happens on each subscriber's loop."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                self.unsubscribe(subscription) # Its event loop has shut down
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.EVENTS_BROKER)()
+    return _broker
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+def publish_to_users(user_ids, event):
+    broker = get_broker()
+    for user_id in user_ids:
+        broker.publish(user_channel(user_id), event)
+
+
+def format_event(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def stream_events(user_id, heartbeat=15):
+    """
+    Server-sent events for one user. A comment line every `heartbeat`
+    seconds keeps proxies from closing an idle connection.
+    """
+    subscription = get_broker().subscribe(user_channel(user_id))
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            event = await subscription.get(timeout=heartbeat)
+            yield ": keep-alive\n\n" if event is None else format_event(event)
+    finally:
+        subscription.close()
@@ -0,0 +1,17 @@
+"""
+Named change counters kept in the database, so every server and worker
+process sees them whatever the cache backend. A writer bumps one inside the
+transaction of its change; a process holding its own copy of shared data
+compares the counter with the value its copy was built from.
+"""
+from django.db.models import F
+from .models import Generation
+
+
+def current(name):
+    return Generation.objects.filter(name=name).values_list('value', flat=True).first() or 0
+
+
+def bump(name):
+    if not Generation.objects.filter(name=name).update(value=F('value') + 1):
+        Generation.objects.get_or_create(name=name, defaults={'value': 1})
@@ -0,0 +1,132 @@
+"""
+Distance helpers for radius search and distance-aware matching.
+
+Coordinates are bucketed into a fixed 0.1 degree grid; a radius query turns
+its bounding box into one contiguous range of cell ids per grid row (an
+indexed prefilter) and then refines with the haversine distance.
+
+The matcher compares points as unit vectors: the dot product of two unit
+vectors is the cosine of the angle between them, so "within d km" becomes
+dot >= cos(d / R). That needs only multiplications and additions per pair,
+which give bit-identical results in plain Python and in numpy, keeping
+calculate_match_score and SeekerMatrix in exact agreement.
+"""
+import math
+
+from django.db.models import F, Q
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+CELL_DEG = 0.1
+LAT_CELLS = 1800
+LNG_CELLS = 3600
+
+# Upper bound for radius_km and UserProfile.max_travel_km
+MAX_RADIUS_KM = 100
+
+# Matching bonus: DISTANCE_BONUS_MAX points within the first step, one
+# point less for every further DISTANCE_BONUS_STEP_KM
+DISTANCE_BONUS_STEP_KM = 10
+DISTANCE_BONUS_MAX = 5
+
+
+def has_coordinates(obj):
+    return obj.latitude is not None and obj.longitude is not None
+
+
+def _row(lat):
+    return min(max(int((lat + 90) // CELL_DEG), 0), LAT_CELLS - 1)
+
+
+def _col(lng):
+    return int(((lng + 180) % 360) // CELL_DEG) % LNG_CELLS
+
+
+def grid_cell(lat, lng):
+    """The grid cell id of a point, or None without coordinates."""
+    if lat is None or lng is None:
+        return None
+    return _row(lat) * LNG_CELLS + _col(lng)
+
+
+def cell_ranges(lat, lng, radius_km):
+    """
+    (first, last) inclusive cell id ranges, one per grid row, covering the
+    bounding box of a circle. Boxes crossing the antimeridian get two
+    ranges per row and boxes reaching a pole take whole rows.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    lat_lo, lat_hi = lat - dlat, lat + dlat
+    widest = max(abs(lat_lo), abs(lat_hi))
+    if widest >= 90:
+        spans = [(0, LNG_CELLS - 1)]
+    else:
+        dlng = math.degrees(radius_km / (EARTH_RADIUS_KM * math.cos(math.radians(widest))))
+        if dlng >= 180:
+            spans = [(0, LNG_CELLS - 1)]
+        else:
+            first, last = _col(lng - dlng), _col(lng + dlng)
+            spans = [(first, last)] if first <= last else [(first, LNG_CELLS - 1), (0, last)]
+
+    return [
+        (row * LNG_CELLS + first, row * LNG_CELLS + last)
+        for row in range(_row(lat_lo), _row(lat_hi) + 1)
+        for first, last in spans
+    ]
+
+
+def cells_within(lat, lng, radius_km):
+    for first, last in cell_ranges(lat, lng, radius_km):
+        yield from range(first, last + 1)
+
+
+def cell_filter(lat, lng, radius_km, field='geo_cell'):
+    """Q object selecting rows whose cell lies in the circle's bounding box."""
+    query = Q()
+    for first, last in cell_ranges(lat, lng, radius_km):
+        query |= Q(**{f'{field}__range': (first, last)})
+    return query
+
+
+def haversine_km(lat, lng, lat_field='latitude', lng_field='longitude'):
+    """Database expression for the great-circle distance from (lat, lng) to a row."""
+    phi = math.radians(lat)
+    half_dlat = (Radians(F(lat_field)) - phi) / 2
+    half_dlng = (Radians(F(lng_field)) - math.radians(lng)) / 2
+    a = Power(Sin(half_dlat), 2) + math.cos(phi) * Cos(Radians(F(lat_field))) * Power(Sin(half_dlng), 2)
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a))
+
+
+def within_radius(queryset, lat, lng, radius_km):
+    """
+    Rows of queryset within radius_km of (lat, lng), annotated with
+    distance_km. The grid prefilter keeps the haversine to the bounding box.
+    """
+    return queryset.filter(cell_filter(lat, lng, radius_km)).annotate(
+        distance_km=haversine_km(lat, lng)
+    ).filter(distance_km__lte=radius_km)
+
+
+def unit_vector(lat, lng):
+    """The point on the unit sphere, or None without coordinates."""
+    if lat is None or lng is None:
+        return None
+    phi, lam = math.radians(lat), math.radians(lng)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def cos_within(km):
+    """Dot product threshold for "no further apart than km"."""
+    return math.cos(km / EARTH_RADIUS_KM)
+
+
+BONUS_THRESHOLDS = [cos_within(DISTANCE_BONUS_STEP_KM * step) for step in range(1, DISTANCE_BONUS_MAX + 1)]
+
+
+def distance_bonus(cosine):
+    """Points for closeness: one per bonus step the distance is under."""
+    return sum(1 for threshold in BONUS_THRESHOLDS if cosine > threshold)
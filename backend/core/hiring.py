@@ -0,0 +1,55 @@
+"""
+Accepting an application. Each accept starts by closing the job with an
+UPDATE of its row, which holds the row (on SQLite, the database) write lock
+until the transaction ends, so concurrent accepts on one job run one after
+another. A job is taken once it has an ACCEPTED application; later accepts
+fail with JobClosed. Deactivated jobs without one can still be accepted.
+The UPDATE bypasses JobPost.save() and its post_save rematch (a closed job
+has nothing to match): the job's matches are deleted directly and the
+cached job lists invalidated.
+"""
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from .messaging import get_or_create_direct_conversation, record_new_message
+from .models import Application, JobPost, Match, Message, UserProfile
+from .response_cache import invalidate_job_lists
+
+
+class JobClosed(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "This job has already been filled."
+    default_code = 'job_closed'
+
+
+def accept_application(application, business):
+    """
+    Accepts `application` on behalf of `business` (its job's owner): closes
+    the job, rejects the other pending applications, drops the job's matches
+    and sends the seeker the acceptance message, all in one transaction.
+    Raises JobClosed when the job has an accepted application already.
+    """
+    job = application.job
+    with transaction.atomic():
+        # Write first: a read before it would let two accepts both see no
+        # accepted application
+        JobPost.objects.filter(id=job.id).update(is_active=False)
+        if Application.objects.filter(job=job, status='ACCEPTED').exists():
+            raise JobClosed()
+        job.is_active = False
+
+        Application.objects.filter(id=application.id).update(status='ACCEPTED')
+        application.status = 'ACCEPTED'
+        Application.objects.filter(job=job, status='APPLIED').exclude(id=application.id).update(status='REJECTED')
+        Match.objects.filter(job=job).delete()
+        invalidate_job_lists(job.business_id)
+
+        conversation, _ = get_or_create_direct_conversation(business, application.seeker)
+        business_phone = UserProfile.objects.filter(user=business).values_list('phone_number', flat=True).first()
+        message = Message.objects.create(
+            conversation=conversation,
+            sender=business,
+            content=f"Congratulations! Your application for '{job.title}' has been accepted. You can contact the business owner at {business_phone}."
+        )
+        record_new_message(message)
+    return application
@@ -0,0 +1,178 @@
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from .geo import MAX_RADIUS_KM, cells_within, grid_cell
+from . import generations
+from .models import UserProfile
+from accounts.models import User
+
+
+def normalize_cities(location, locations):
+    """The set of lowercase cities a seeker can work in, as the scorer sees them."""
+    cities = {loc.strip().lower() for loc in (locations or [])}
+    if location:
+        cities.add(location.strip().lower())
+    return cities
+
+
+def travel_cell(latitude, longitude, max_travel_km):
+    """Grid cell a seeker is posted under for distance matching, if any."""
+    if not max_travel_km:
+        return None
+    return grid_cell(latitude, longitude)
+
+
+def current_generation():
+    return generations.current('seeker_index')
+
+
+def bump_generation():
+    """Marks every process's seeker index stale; call inside the change's transaction."""
+    generations.bump('seeker_index')
+
+
+class SeekerIndex:
+    """
+    In-process inverted index over available seekers: skill id -> seeker
+    user ids, city -> seeker user ids and, for seekers matched by travel
+    distance, grid cell -> seeker user ids. Job matching intersects these
+    posting lists instead of scanning the seeker table.
+
+    The index is built lazily from the database. Every seeker change bumps
+    the shared 'seeker_index' generation; a lookup that finds it moved on
+    since the build rebuilds first, so changes made in other processes are
+    never missed. Changes in this process are also applied on commit, and
+    the index is rebuilt once older than MATCH_INDEX_MAX_AGE seconds to pick
+    up writes that bypass the signals.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+        self.built_at = None
+        self.generation = None
+
+    def _clear(self):
+        self.by_skill = defaultdict(set)
+        self.by_city = defaultdict(set)
+        self.by_cell = defaultdict(set)
+        self.entries = {} # user_id -> (cities, skill ids, cell), used to unlink on update
+
+    def _link(self, user_id, cities, skills, cell):
+        self.entries[user_id] = (cities, skills, cell)
+        for city in cities:
+            self.by_city[city].add(user_id)
+        for skill in skills:
+            self.by_skill[skill].add(user_id)
+        if cell is not None:
+            self.by_cell[cell].add(user_id)
+
+    def _unlink(self, user_id):
+        cities, skills, cell = self.entries.pop(user_id, (set(), set(), None))
+        keys = [*((c, self.by_city) for c in cities), *((s, self.by_skill) for s in skills)]
+        if cell is not None:
+            keys.append((cell, self.by_cell))
+        for key, postings in keys:
+            postings[key].discard(user_id)
+            if not postings[key]:
+                del postings[key]
+
+    def rebuild(self, generation=None):
+        # Read before the seekers: a change committed meanwhile triggers another rebuild
+        generation = current_generation() if generation is None else generation
+        seekers = UserProfile.objects.filter(user__role=User.Role.SEEKER, is_available=True)
+        skills = defaultdict(set)
+        for user_id, skill_id in UserProfile.skills.through.objects.filter(
+            userprofile__in=seekers
+        ).values_list('userprofile__user_id', 'skill_id'):
+            skills[user_id].add(skill_id)
+
+        with self._lock:
+            self._clear()
+            for user_id, location, locations, lat, lng, travel in seekers.values_list(
+                'user_id', 'location', 'locations', 'latitude', 'longitude', 'max_travel_km'
+            ):
+                self._link(user_id, normalize_cities(location, locations), skills[user_id], travel_cell(lat, lng, travel))
+            self.built_at = time.monotonic()
+            self.generation = generation
+
+    def ensure_fresh(self):
+        """Rebuilds if a seeker changed anywhere since the build, or the build is too old."""
+        generation = current_generation()
+        if (self.built_at is None or generation != self.generation
+                or time.monotonic() - self.built_at > settings.MATCH_INDEX_MAX_AGE):
+            self.rebuild(generation)
+
+    def refresh_seeker(self, profile_id):
+        """Re-reads one profile from the database and updates its postings."""
+        if self.built_at is None:
+            return # Not built yet, the first lookup reads everything anyway
+        profile = UserProfile.objects.filter(id=profile_id).select_related('user').first()
+        skills = set(profile.skills.values_list('id', flat=True)) if profile else set()
+        with self._lock:
+            if profile:
+                self._unlink(profile.user_id)
+                if profile.user.role == User.Role.SEEKER and profile.is_available:
+                    self._link(
+                        profile.user_id,
+                        normalize_cities(profile.location, profile.locations),
+                        skills,
+                        travel_cell(profile.latitude, profile.longitude, profile.max_travel_km),
+                    )
+
+    def remove_seeker(self, user_id):
+        bump_generation()
+        with self._lock:
+            self._unlink(user_id)
+
+    def schedule_refresh(self, profile_id):
+        bump_generation()
+        transaction.on_commit(lambda: self.refresh_seeker(profile_id))
+
+    def candidates(self, city, skill_ids, latitude=None, longitude=None, check_fresh=True):
+        """
+        User ids of available seekers in `city`, or (for a job with
+        coordinates) with a travel limit that could reach it, holding at
+        least one of skill_ids (or any such seeker when skill_ids is empty).
+        Callers looking up many jobs at once can call ensure_fresh() once
+        and pass check_fresh=False.
+        """
+        if check_fresh:
+            self.ensure_fresh()
+        with self._lock:
+            found = set(self.by_city.get(city, ()))
+            if latitude is not None and longitude is not None and self.by_cell:
+                for cell in cells_within(latitude, longitude, MAX_RADIUS_KM):
+                    found |= self.by_cell.get(cell, set())
+            if skill_ids:
+                with_skill = set()
+                for skill in skill_ids:
+                    with_skill |= self.by_skill.get(skill, set())
+                found &= with_skill
+            return found
+
+    def memory_footprint(self):
+        """Approximate bytes held by the posting lists and per-seeker entries."""
+        with self._lock:
+            size = sum(sys.getsizeof(obj) for obj in (self.by_skill, self.by_city, self.by_cell, self.entries))
+            for postings in (self.by_skill, self.by_city, self.by_cell):
+                size += sum(sys.getsizeof(key) + sys.getsizeof(ids) for key, ids in postings.items())
+            for user_id, (cities, skills, cell) in self.entries.items():
+                size += sys.getsizeof(user_id) + sys.getsizeof(cities) + sys.getsizeof(skills)
+            return size
+
+    def stats(self):
+        with self._lock:
+            return {
+                'seekers': len(self.entries),
+                'skills': len(self.by_skill),
+                'cities': len(self.by_city),
+                'cells': len(self.by_cell),
+                'postings': sum(len(ids) for postings in (self.by_skill, self.by_city, self.by_cell) for ids in postings.values()),
+            }
+
+
+seeker_index = SeekerIndex()
@@ -0,0 +1,41 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from core.models import Conversation
+
+
+class Command(BaseCommand):
+    help = (
+        "Sets direct_key on existing two-party conversations. When a pair has several "
+        "conversations the oldest one gets the key; the rest keep their history unkeyed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        participants = defaultdict(list)
+        rows = Conversation.participants.through.objects.filter(
+            conversation__direct_key__isnull=True
+        ).values_list('conversation_id', 'user_id').order_by('conversation_id')
+        for conversation_id, user_id in rows.iterator():
+            participants[conversation_id].append(user_id)
+
+        taken = set(Conversation.objects.filter(direct_key__isnull=False).values_list('direct_key', flat=True))
+        to_update = []
+        skipped = 0
+        for conversation_id, user_ids in sorted(participants.items()):
+            if len(user_ids) != 2:
+                continue
+            low, high = sorted(user_ids)
+            key = f"{low}:{high}"
+            if key in taken:
+                skipped += 1
+                continue
+            taken.add(key)
+            to_update.append(Conversation(id=conversation_id, direct_key=key))
+
+        Conversation.objects.bulk_update(to_update, ['direct_key'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Keyed {len(to_update)} conversations, {skipped} duplicates left unkeyed"
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from core.geo import grid_cell
+from core.models import JobPost
+
+
+class Command(BaseCommand):
+    help = "Sets geo_cell on jobs with coordinates saved before radius search existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rows = JobPost.objects.filter(
+            geo_cell__isnull=True, latitude__isnull=False, longitude__isnull=False
+        ).values_list('id', 'latitude', 'longitude')
+        to_update = [JobPost(id=job_id, geo_cell=grid_cell(lat, lng)) for job_id, lat, lng in rows.iterator()]
+        JobPost.objects.bulk_update(to_update, ['geo_cell'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Set geo_cell on {len(to_update)} jobs"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from core.models import Match
+from core.utils import refresh_match_visibility
+
+
+class Command(BaseCommand):
+    help = "Recomputes Match.visible for existing matches, one id range per UPDATE."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        last_id = Match.objects.aggregate(last=Max('id'))['last'] or 0
+        hidden = 0
+        for start in range(0, last_id, options['batch_size']):
+            batch = Match.objects.filter(id__gt=start, id__lte=start + options['batch_size'])
+            refresh_match_visibility(batch)
+            hidden += batch.filter(visible=False).count()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed visibility up to match {last_id}, {hidden} hidden"))
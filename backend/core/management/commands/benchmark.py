@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from core.benchmarks import SCENARIOS, run
+
+
+class Command(BaseCommand):
+    help = "Runs a performance scenario against throwaway fixture data (rolled back afterwards)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', choices=sorted(SCENARIOS))
+        parser.add_argument('--size', type=int, default=100_000, help="Scenario size, e.g. number of pairs or rows.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        run(options['scenario'], self.stdout, options['size'], options['seed'])
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.bulk import FORMATS, JobImportError, detect_format, import_jobs, read_records
+from accounts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates jobs for a business from a CSV or NDJSON file. Nothing is imported "
+        "when any record is invalid; matching is queued once for all new jobs. "
+        "Servers' cached job lists only refresh right away when CACHES is shared."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        business = User.objects.filter(username=options['username'], role=User.Role.BUSINESS).first()
+        if business is None:
+            raise CommandError(f"No business named {options['username']}")
+        file_format = options['format'] or detect_format(options['path'])
+        if file_format is None:
+            raise CommandError("Cannot tell the format from the file name; pass --format")
+
+        try:
+            with open(options['path'], 'rb') as stream:
+                created = import_jobs(business, read_records(stream, file_format), chunk_size=options['chunk_size'])
+        except JobImportError as e:
+            for error in e.errors:
+                self.stderr.write(f"line {error['line']}: {error['errors']}")
+            raise CommandError(f"Import rejected: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {created} jobs"))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from core.index import bump_generation, seeker_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the seeker skill/city index from the database and reports its size. "
+        "Running servers and workers rebuild their own copy before their next lookup."
+    )
+
+    def handle(self, *args, **options):
+        bump_generation()
+        started = time.perf_counter()
+        seeker_index.rebuild()
+        elapsed = time.perf_counter() - started
+
+        stats = seeker_index.stats()
+        self.stdout.write(
+            f"Indexed {stats['seekers']} seekers: {stats['skills']} skills, "
+            f"{stats['cities']} cities, {stats['postings']} postings in {elapsed:.3f}s"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Memory footprint: {seeker_index.memory_footprint() / 1024:.1f} KiB"
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from core.search import job_search
+
+
+class Command(BaseCommand):
+    help = "Recreates the job full-text search index from the JobPost table."
+
+    def handle(self, *args, **options):
+        backend = job_search()
+        count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} jobs with {type(backend).__name__}"))
@@ -0,0 +1,63 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from core import generations
+from core.messaging import invalidate_unread_counts
+from core.models import Conversation, Message, UnreadCounter
+
+
+class Command(BaseCommand):
+    help = (
+        "Recounts unread messages from the Message table and repairs drifted UnreadCounter rows. "
+        "Running servers drop their cached totals within messaging.UNREAD_GENERATION_CHECK seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without fixing it.")
+
+    def handle(self, *args, **options):
+        # Unread messages per conversation, split by sender
+        unread_by_sender = defaultdict(dict)
+        for row in Message.objects.filter(is_read=False).values('conversation_id', 'sender_id').annotate(n=Count('id')):
+            unread_by_sender[row['conversation_id']][row['sender_id']] = row['n']
+
+        # Each participant's count is everything unread not sent by them
+        expected = {}
+        participants = Conversation.participants.through.objects.filter(
+            conversation_id__in=list(unread_by_sender)
+        ).values_list('conversation_id', 'user_id')
+        for conversation_id, user_id in participants:
+            senders = unread_by_sender[conversation_id]
+            count = sum(n for sender_id, n in senders.items() if sender_id != user_id)
+            if count:
+                expected[(user_id, conversation_id)] = count
+
+        existing = {(c.user_id, c.conversation_id): c for c in UnreadCounter.objects.all()}
+        to_create = [
+            UnreadCounter(user_id=user_id, conversation_id=conversation_id, count=count)
+            for (user_id, conversation_id), count in expected.items()
+            if (user_id, conversation_id) not in existing
+        ]
+        to_update = []
+        for key, counter in existing.items():
+            count = expected.get(key, 0)
+            if counter.count != count:
+                counter.count = count
+                to_update.append(counter)
+
+        drifted = {counter.user_id for counter in to_create + to_update}
+        if not options['dry_run']:
+            with transaction.atomic():
+                UnreadCounter.objects.bulk_create(to_create)
+                UnreadCounter.objects.bulk_update(to_update, ['count'])
+                if drifted:
+                    # This process's cache is not the servers'; the new generation reaches them
+                    generations.bump('unread_counts')
+            invalidate_unread_counts(drifted)
+
+        verb = "Would repair" if options['dry_run'] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {len(to_create)} missing and {len(to_update)} drifted counters for {len(drifted)} users"
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from core.rematch import rematch_all
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the whole Match table, scoring shards of jobs in parallel worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count, 1 runs inline).")
+        parser.add_argument('--shard-size', type=int, default=200, help="Jobs per shard.")
+        parser.add_argument('--dry-run', action='store_true', help="Report the diff without writing it.")
+
+    def handle(self, *args, **options):
+        created, updated, deleted = rematch_all(
+            workers=options['workers'],
+            shard_size=options['shard_size'],
+            dry_run=options['dry_run'],
+            progress=self.stdout.write,
+        )
+        verb = "Would apply" if options['dry_run'] else "Applied"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb}: {created} created, {updated} updated, {deleted} deleted"
+        ))
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from core.models import MatchTask
+from core.tasks import run_pending
+
+
+class Command(BaseCommand):
+    help = "Runs queued match recomputations and reports worker throughput."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the queue and exit instead of polling.")
+        parser.add_argument('--batch-size', type=int, default=100, help="Tasks claimed per batch.")
+        parser.add_argument('--sleep', type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        total = total_failed = 0
+        started = time.perf_counter()
+        try:
+            while True:
+                batch_started = time.perf_counter()
+                try:
+                    processed, failed = run_pending(limit=options['batch_size'])
+                except Exception as e:
+                    # e.g. the database is locked; the claim rolled back, try again later
+                    self.stderr.write(f"Claiming tasks failed: {type(e).__name__}: {e}")
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+                if processed or failed:
+                    total += processed
+                    total_failed += failed
+                    elapsed = time.perf_counter() - batch_started
+                    self.stdout.write(
+                        f"Processed {processed} tasks in {elapsed:.3f}s "
+                        f"({processed / elapsed:.1f} tasks/s), {MatchTask.objects.count()} pending"
+                    )
+                    if failed:
+                        self.stderr.write(f"{failed} tasks failed and were queued again, see MatchTask.last_error")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"Worker finished: {total} tasks in {elapsed:.3f}s ({rate:.1f} tasks/s), {total_failed} failed"
+        ))
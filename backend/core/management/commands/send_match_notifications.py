@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from core.notifications import notify_matches
+
+
+class Command(BaseCommand):
+    help = "Sends seekers and businesses one digest each for their new matches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Send one round of digests and exit instead of polling.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Unnotified matches read per batch.")
+        parser.add_argument('--interval', type=float, default=900.0, help="Seconds between digest rounds.")
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                started = time.perf_counter()
+                totals = notify_matches(batch_size=options['batch_size'])
+                elapsed = time.perf_counter() - started
+                for side, (flagged, recipients) in totals.items():
+                    self.stdout.write(f"{side}: {flagged} matches in digests for {recipients} recipients")
+                self.stdout.write(f"Round took {elapsed:.3f}s")
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,115 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Greatest
+from . import generations
+from .events import publish_to_users
+from .models import Conversation, UnreadCounter
+from .serializers import MessageSerializer
+
+# Per-user unread totals are cached; entries are dropped whenever a
+# counter changes and expire anyway to bound drift between processes.
+UNREAD_CACHE_TIMEOUT = 300
+# Seconds between reads of the 'unread_counts' generation, part of every
+# cache key; reconcile_unread_counts bumps it to retire all cached totals,
+# including those in other processes' caches.
+UNREAD_GENERATION_CHECK = 5
+
+_generation = {'value': 0, 'checked_at': None}
+
+
+def direct_key(user_a, user_b):
+    low, high = sorted((user_a.id, user_b.id))
+    return f"{low}:{high}"
+
+
+def get_or_create_direct_conversation(user_a, user_b):
+    """
+    The two-party conversation between the users, found with a single
+    unique-index lookup on direct_key. Returns (conversation, created).
+    """
+    with transaction.atomic():
+        conversation, created = Conversation.objects.get_or_create(direct_key=direct_key(user_a, user_b))
+        if created:
+            conversation.participants.add(user_a, user_b)
+    return conversation, created
+
+
+def unread_generation():
+    now = time.monotonic()
+    checked_at = _generation['checked_at']
+    if checked_at is None or now - checked_at >= UNREAD_GENERATION_CHECK:
+        _generation.update(value=generations.current('unread_counts'), checked_at=now)
+    return _generation['value']
+
+
+def unread_cache_key(user_id):
+    return f"unread_total:{unread_generation()}:{user_id}"
+
+
+def unread_message_count(user):
+    key = unread_cache_key(user.id)
+    count = cache.get(key)
+    if count is None:
+        count = UnreadCounter.objects.filter(user=user).aggregate(total=Sum('count'))['total'] or 0
+        cache.set(key, count, UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def invalidate_unread_counts(user_ids):
+    cache.delete_many([unread_cache_key(user_id) for user_id in user_ids])
+
+
+def _publish_unread_counts(users):
+    for user in users:
+        publish_to_users([user.id], {'type': 'unread_count', 'count': unread_message_count(user)})
+
+
+def record_new_message(message):
+    """
+    Bumps the recipients' unread counters for a saved message, then pushes
+    the message and their new counts once committed.
+    """
+    participants = list(message.conversation.participants.all())
+    recipient_ids = [user.id for user in participants if user.id != message.sender_id]
+    # Make sure the rows exist, then increment in one UPDATE; safe under concurrent sends
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(user_id=user_id, conversation_id=message.conversation_id) for user_id in recipient_ids],
+        ignore_conflicts=True,
+    )
+    UnreadCounter.objects.filter(
+        conversation_id=message.conversation_id, user_id__in=recipient_ids
+    ).update(count=F('count') + 1)
+
+    def publish():
+        invalidate_unread_counts(recipient_ids)
+        publish_to_users([user.id for user in participants], {
+            'type': 'message',
+            'conversation': message.conversation_id,
+            'message': MessageSerializer(message).data,
+        })
+        _publish_unread_counts(user for user in participants if user.id != message.sender_id)
+    transaction.on_commit(publish)
+
+
+def record_messages_read(conversation, reader, count):
+    """
+    Takes `count` newly read messages off the reader's counter, then tells
+    the other participants their messages were read.
+    """
+    UnreadCounter.objects.filter(user=reader, conversation=conversation).update(
+        count=Greatest(F('count') - count, Value(0))
+    )
+
+    def publish():
+        invalidate_unread_counts([reader.id])
+        others = [user.id for user in conversation.participants.all() if user.id != reader.id]
+        publish_to_users(others, {
+            'type': 'read',
+            'conversation': conversation.id,
+            'reader': reader.username,
+        })
+        _publish_unread_counts([reader])
+    transaction.on_commit(publish)
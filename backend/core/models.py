@@ -1,5 +1,8 @@
 from django.db import models
 from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
+from .availability import compile_schedule
+from .geo import MAX_RADIUS_KM, grid_cell
 
 class Skill(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -26,6 +29,19 @@ class UserProfile(models.Model):
     min_pay = models.PositiveIntegerField(null=True, blank=True)
     max_pay = models.PositiveIntegerField(null=True, blank=True)
     bio = models.TextField(blank=True, null=True)
+    # With coordinates set, matching uses this distance instead of the city lists
+    max_travel_km = models.PositiveIntegerField(
+        null=True, blank=True, validators=[MinValueValidator(1), MaxValueValidator(MAX_RADIUS_KM)]
+    )
+    # availability in the matcher's bitmask/minutes form, see core.availability
+    compiled_availability = models.JSONField(default=dict, blank=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        self.compiled_availability = compile_schedule(self.availability)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'availability' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'compiled_availability'}
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"Profile for {self.user.username}"
@@ -46,6 +62,38 @@ class JobPost(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
+    # requirements in the matcher's bitmask/minutes form, see core.availability
+    compiled_requirements = models.JSONField(default=dict, blank=True, editable=False)
+    # grid cell of latitude/longitude for radius search, see core.geo
+    geo_cell = models.IntegerField(null=True, blank=True, editable=False, db_index=True)
+
+    def compile_fields(self):
+        """Derives the matcher/search columns; bulk inserts must call it themselves."""
+        self.compiled_requirements = compile_schedule(self.requirements)
+        self.geo_cell = grid_cell(self.latitude, self.longitude)
+
+    def save(self, *args, **kwargs):
+        self.compile_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'requirements' in update_fields:
+                update_fields.add('compiled_requirements')
+            if {'latitude', 'longitude'} & update_fields:
+                update_fields.add('geo_cell')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            # The seeker feed, the business's own list and their orderings,
+            # with id as the keyset tie-break. The feed indexes are partial on
+            # is_active: SQLite renders is_active=True as a bare column test,
+            # which a leading is_active column could not serve.
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_active=True), name='jobpost_active_created_idx'),
+            models.Index(fields=['pay_per_day', 'id'], condition=models.Q(is_active=True), name='jobpost_active_pay_idx'),
+            models.Index(fields=['business', 'created_at', 'id'], name='jobpost_business_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} by {self.business.username}"
@@ -57,9 +105,22 @@ class Match(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     notified_seeker = models.BooleanField(default=False)
     notified_business = models.BooleanField(default=False)
+    # Shown in the match feeds: job active, seeker available and not applied.
+    # Maintained by core.utils.refresh_match_visibility.
+    visible = models.BooleanField(default=True)
 
     class Meta:
         unique_together = ('job', 'seeker')
+        indexes = [
+            # The seeker feed is one range of this index, already ranked. Partial
+            # rather than keyed on visible: SQLite tests booleans as bare columns.
+            models.Index(fields=['seeker', '-score', 'id'], name='match_seeker_feed_idx', condition=models.Q(visible=True)),
+            # Top candidates of one job (matches/?job=&top=)
+            models.Index(fields=['job', '-score', 'id'], name='match_job_feed_idx', condition=models.Q(visible=True)),
+            # Pending digests only, scanned in id order by core.notifications
+            models.Index(fields=['id'], name='match_unnotified_seeker_idx', condition=models.Q(notified_seeker=False)),
+            models.Index(fields=['id'], name='match_unnotified_business_idx', condition=models.Q(notified_business=False)),
+        ]
 
     def __str__(self):
         return f"Match: {self.job.title} - {self.seeker.username}"
@@ -83,6 +144,8 @@ class Application(models.Model):
 
 class Conversation(models.Model):
     participants = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='conversations')
+    # "<lower user id>:<higher user id>" for two-party chats, see core.messaging
+    direct_key = models.CharField(max_length=41, unique=True, null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -98,6 +161,60 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Serves the after_id sync in MessageViewSet
+            models.Index(fields=['conversation', 'id'], name='message_conversation_id_idx'),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.username}"
+
+class MatchTask(models.Model):
+    """
+    Pending match recomputation for one job or seeker profile.
+    Rows are claimed and deleted by the run_match_worker command; a failed
+    run queues the row again with attempts raised, and after
+    MATCH_TASK_MAX_ATTEMPTS failures it is left as a dead letter.
+    """
+    class Kind(models.TextChoices):
+        JOB = "JOB", "Recompute job"
+        SEEKER = "SEEKER", "Recompute seeker"
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    object_id = models.PositiveBigIntegerField() # JobPost id or UserProfile id
+    created_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.object_id}"
+
+class Generation(models.Model):
+    """
+    Named change counter shared by all processes through the database, see
+    core.generations.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} generation {self.value}"
+
+class UnreadCounter(models.Model):
+    """
+    Denormalized number of unread messages per user and conversation,
+    maintained by core.messaging and repaired by reconcile_unread_counts.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='unread_counters')
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='unread_counters')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'conversation')
+
+    def __str__(self):
+        return f"{self.user.username}: {self.count} unread in conversation {self.conversation_id}"
@@ -0,0 +1,109 @@
+"""
+Digest notifications for new matches. Unnotified matches are read in id
+order through the partial indexes on the notified_* flags, grouped per
+recipient into one outbox email and one `matches` event each, and flagged
+with a single UPDATE per batch. Matches on closed jobs are flagged without
+being announced.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from accounts.mail import enqueue_emails
+from .events import publish_to_users
+from .models import Match
+
+# Jobs (or candidates per job) listed in a digest; the rest are counted
+DIGEST_ITEMS = 5
+
+
+def _pay(pay_per_day):
+    return f", ₹{pay_per_day}/day" if pay_per_day else ""
+
+
+def seeker_digest(username, rows):
+    rows = sorted(rows, key=lambda row: -row['score'])
+    lines = [f"- {row['job__title']} in {row['job__location']}{_pay(row['job__pay_per_day'])}" for row in rows[:DIGEST_ITEMS]]
+    if len(rows) > DIGEST_ITEMS:
+        lines.append(f"...and {len(rows) - DIGEST_ITEMS} more")
+    body = (
+        f"Hello {username},\n\n{len(rows)} new job(s) on SmallJobs match your profile:\n\n"
+        + "\n".join(lines)
+        + "\n\nSee them here: http://localhost:5173/seeker"
+    )
+    return f"{len(rows)} new job matches on SmallJobs", body
+
+
+def business_digest(username, rows):
+    by_job = defaultdict(list)
+    for row in rows:
+        by_job[row['job__title']].append(row)
+    lines = []
+    for title, job_rows in sorted(by_job.items(), key=lambda item: -len(item[1]))[:DIGEST_ITEMS]:
+        best = sorted(job_rows, key=lambda row: -row['score'])[:3]
+        lines.append(f"- {title}: {len(job_rows)} new candidate(s), including {', '.join(row['seeker__username'] for row in best)}")
+    if len(by_job) > DIGEST_ITEMS:
+        lines.append(f"...and {len(by_job) - DIGEST_ITEMS} more jobs")
+    body = (
+        f"Hello {username},\n\n{len(rows)} new candidate(s) on SmallJobs match your jobs:\n\n"
+        + "\n".join(lines)
+        + "\n\nReview them here: http://localhost:5173/business"
+    )
+    return f"{len(rows)} new candidates on SmallJobs", body
+
+
+# Per side: the flag, the recipient's id/username/email columns and the digest
+SIDES = {
+    'seeker': ('notified_seeker', 'seeker_id', 'seeker__username', 'seeker__email', seeker_digest),
+    'business': ('notified_business', 'job__business_id', 'job__business__username', 'job__business__email', business_digest),
+}
+COLUMNS = ['id', 'score', 'job__is_active', 'job__title', 'job__location', 'job__pay_per_day', 'seeker__username']
+
+
+def notify_batch(side, batch_size=1000):
+    """
+    Sends the digests for one side ('seeker' or 'business') to the
+    recipients of the next `batch_size` unnotified matches, covering all
+    of their unnotified matches. Returns (matches flagged, recipients).
+    """
+    flag, recipient, username, email, digest = SIDES[side]
+    with transaction.atomic():
+        unnotified = Match.objects.filter(**{flag: False})
+        recipient_ids = set(unnotified.order_by('id').values_list(recipient, flat=True)[:batch_size])
+        if not recipient_ids:
+            return 0, 0
+        # All of these recipients' pending matches, so each gets one digest per run
+        rows = list(unnotified.filter(**{f'{recipient}__in': recipient_ids}).values(*COLUMNS, recipient, username, email))
+
+        grouped = defaultdict(list)
+        for row in rows:
+            if row['job__is_active']:
+                grouped[row[recipient]].append(row)
+        emails = [
+            (*digest(recipient_rows[0][username], recipient_rows), [recipient_rows[0][email]])
+            for recipient_rows in grouped.values()
+            if recipient_rows[0][email]
+        ]
+        enqueue_emails(emails)
+        # Same filter as the read, bounded by the last id seen: one UPDATE without an id list
+        unnotified.filter(**{f'{recipient}__in': recipient_ids}, id__lte=max(row['id'] for row in rows)).update(**{flag: True})
+
+        def publish():
+            for recipient_id, recipient_rows in grouped.items():
+                publish_to_users([recipient_id], {'type': 'matches', 'count': len(recipient_rows)})
+        transaction.on_commit(publish)
+    return len(rows), len(grouped)
+
+
+def notify_matches(batch_size=1000):
+    """Drains both sides; returns {'seeker': (flagged, digests), 'business': ...}."""
+    totals = {}
+    for side in SIDES:
+        flagged = digests = 0
+        while True:
+            batch_flagged, batch_digests = notify_batch(side, batch_size)
+            if not batch_flagged:
+                break
+            flagged += batch_flagged
+            digests += batch_digests
+        totals[side] = (flagged, digests)
+    return totals
@@ -0,0 +1,116 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset ("seek") pagination. Each page continues after the
+    (sort value, id) of the previous page's last row with a WHERE clause
+    instead of an OFFSET, so deep pages cost the same as the first one,
+    and no COUNT(*) is run. The sort field comes from the `ordering`
+    parameter, limited to `fields`; id breaks ties and NULLs sort last.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    fields = ('created_at', 'pay_per_day', 'title')
+    default_ordering = '-created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    @classmethod
+    def supports(cls, ordering):
+        return (ordering or cls.default_ordering).lstrip('-') in cls.fields
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = request.query_params.get(self.ordering_query_param) or self.default_ordering
+        if not self.supports(ordering):
+            ordering = self.default_ordering
+        self.field = ordering.lstrip('-')
+        self.descending = ordering.startswith('-')
+        self.model_field = queryset.model._meta.get_field(self.field)
+        self.nullable = self.model_field.null
+
+        position = self.decode_cursor(request)
+        value, pk = position or (None, None)
+        beyond = 'lt' if self.descending else 'gt'
+        limit = self.page_size + 1
+
+        rows = []
+        if position is None or value is not None:
+            head = queryset.filter(**{f'{self.field}__isnull': False}) if self.nullable else queryset
+            if position is not None:
+                head = head.filter(self.after(value, pk))
+            rows = list(head.order_by(*self.order_by())[:limit])
+        if self.nullable and len(rows) < limit:
+            # NULLs form a trailing block in either direction, ordered by id.
+            # Reading it separately keeps an OR out of the head query, which
+            # would stop the planner from seeking in the index.
+            tail = queryset.filter(**{f'{self.field}__isnull': True})
+            if value is None and pk is not None:
+                tail = tail.filter(**{f'id__{beyond}': pk})
+            rows += tail.order_by('-id' if self.descending else 'id')[:limit - len(rows)]
+
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def order_by(self):
+        prefix = '-' if self.descending else ''
+        return [f'{prefix}{self.field}', f'{prefix}id']
+
+    def after(self, value, pk):
+        """Rows sorting after (value, pk), for a non-null value."""
+        beyond = 'lt' if self.descending else 'gt'
+        # The redundant inclusive bound gives the planner a range to seek to
+        return Q(**{f'{self.field}__{beyond}e': value}) & (
+            Q(**{f'{self.field}__{beyond}': value}) | Q(**{f'id__{beyond}': pk})
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            if value is not None:
+                value = self.model_field.to_python(value)
+            return value, int(pk)
+        except (TypeError, ValueError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row):
+        value = getattr(row, self.field)
+        if isinstance(value, datetime.datetime):
+            value = value.isoformat() # Full precision, DjangoJSONEncoder drops microseconds
+        return base64.urlsafe_b64encode(json.dumps([value, row.pk]).encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,94 @@
+"""
+Full rebuild of the Match table, with jobs split into shards and scored in
+a process pool against one read-only SeekerMatrix snapshot.
+
+Worker-side code imports Django lazily and receives the snapshot pickled,
+so it also runs under the spawn start method, where children begin without
+a populated app registry.
+"""
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+_matrix = None
+
+
+def _init_worker(matrix_bytes):
+    global _matrix
+    import django
+    django.setup()
+    _matrix = pickle.loads(matrix_bytes)
+
+
+def _score_shard(jobs):
+    """Scores a shard of job facts, returning (job_id, seeker_id, score) rows."""
+    rows = []
+    for job_id, city, skill_ids, req, pay_per_day, point in jobs:
+        scores = _matrix.score_facts(city, skill_ids, req, pay_per_day, point)
+        for row in np.flatnonzero(scores > 0):
+            rows.append((job_id, int(_matrix.user_ids[row]), float(scores[row])))
+    return rows
+
+
+def job_facts(job):
+    from .geo import unit_vector
+    from .utils import job_schedule, skill_ids
+    return (
+        job.id, job.location.strip().lower(), skill_ids(job, 'required_skills'), job_schedule(job),
+        job.pay_per_day, unit_vector(job.latitude, job.longitude),
+    )
+
+
+def rematch_all(workers=None, shard_size=200, dry_run=False, progress=None):
+    """
+    Recomputes every active job against every available seeker and applies
+    the difference to the Match table (matches of inactive jobs are
+    dropped). Returns (created, updated, deleted) counts; with dry_run
+    nothing is written.
+    """
+    global _matrix
+    from django.db import connections, transaction
+    from accounts.models import User
+    from .models import JobPost, Match, UserProfile
+    from .utils import SeekerMatrix, sync_matches
+
+    report = progress or (lambda message: None)
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+
+    profiles = UserProfile.objects.filter(
+        user__role=User.Role.SEEKER, is_available=True
+    ).prefetch_related('skills')
+    matrix = SeekerMatrix(profiles)
+    jobs = [job_facts(job) for job in JobPost.objects.filter(is_active=True).prefetch_related('required_skills')]
+    shards = [jobs[i:i + shard_size] for i in range(0, len(jobs), shard_size)]
+    report(f"Snapshot: {len(matrix)} seekers, {len(jobs)} jobs in {len(shards)} shards ({time.perf_counter() - started:.2f}s)")
+
+    desired = {}
+    done = 0
+    if workers == 1:
+        _matrix = matrix
+        results = (_score_shard(shard) for shard in shards)
+    else:
+        # Children must not inherit the parent's open database connections
+        connections.close_all()
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pickle.dumps(matrix),))
+        results = (future.result() for future in as_completed([pool.submit(_score_shard, shard) for shard in shards]))
+    try:
+        for rows in results:
+            for job_id, seeker_id, score in rows:
+                desired[(job_id, seeker_id)] = score
+            done += 1
+            report(f"Scored shard {done}/{len(shards)}: {len(desired)} matches so far ({time.perf_counter() - started:.2f}s)")
+    finally:
+        if workers != 1:
+            pool.shutdown()
+        _matrix = None
+
+    with transaction.atomic():
+        counts = sync_matches(Match.objects.all(), desired, dry_run=dry_run)
+    report(f"Finished in {time.perf_counter() - started:.2f}s")
+    return counts
@@ -0,0 +1,127 @@
+"""
+Cached GET responses for hot read-only endpoints, with ETag/If-None-Match.
+
+Entries live in the Django cache under a per-scope generation number:
+a scope is an endpoint plus whatever its response depends on (a user, a
+role, or nothing). Invalidating a scope bumps its generation, which
+orphans every cached variant (query strings, pages) at once; the orphans
+expire on their own. Signals invalidate on commit so a concurrent request
+cannot re-cache the rows being replaced.
+
+Hit/miss/304 counts are kept in the cache too, so they add up across
+processes when the cache is shared.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from accounts.models import User
+
+NAMESPACES = ('skills', 'jobs', 'profile')
+OUTCOMES = ('hit', 'miss', 'not_modified')
+
+
+def scope_key(namespace, scope=None):
+    return f"respcache:{namespace}" if scope is None else f"respcache:{namespace}:{scope}"
+
+
+def generation(scope):
+    key = f"{scope}:gen"
+    value = cache.get(key)
+    if value is None:
+        # Start from the clock so a generation lost to eviction is not reused
+        cache.add(key, time.time_ns(), None)
+        value = cache.get(key)
+    return value
+
+
+def invalidate(namespace, scope=None):
+    """Drops the cached responses of a scope once the current transaction commits."""
+    def bump():
+        key = f"{scope_key(namespace, scope)}:gen"
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+    transaction.on_commit(bump)
+
+
+def invalidate_job_lists(business_id):
+    """Drops the seekers' shared job feed and the business's own job list."""
+    invalidate('jobs', f"role:{User.Role.SEEKER}")
+    invalidate('jobs', f"user:{business_id}")
+
+
+def _count(namespace, outcome):
+    key = f"respcache:stats:{namespace}:{outcome}"
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def etag_for(data):
+    payload = json.dumps(data, cls=JSONEncoder, sort_keys=True, separators=(',', ':'))
+    return '"%s"' % hashlib.md5(payload.encode(), usedforsecurity=False).hexdigest()
+
+
+def _matches(request, etag):
+    header = request.headers.get('If-None-Match', '')
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+
+def _respond(request, data, etag):
+    if _matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data)
+    response['ETag'] = etag
+    # Let browsers keep a private copy but revalidate it on every use
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def cached_response(request, namespace, scope, render):
+    """
+    The response for a GET, from the cache when this scope and URL were
+    rendered before; render() builds it otherwise. Only 200 responses are
+    stored. A matching If-None-Match gets an empty 304.
+    """
+    base = scope_key(namespace, scope)
+    url = hashlib.md5(request.build_absolute_uri().encode(), usedforsecurity=False).hexdigest()
+    key = f"{base}:{generation(base)}:{url}"
+
+    entry = cache.get(key)
+    if entry is not None:
+        data, etag = entry
+        _count(namespace, 'not_modified' if _matches(request, etag) else 'hit')
+        return _respond(request, data, etag)
+
+    _count(namespace, 'miss')
+    response = render()
+    if response.status_code != status.HTTP_200_OK:
+        return response
+    etag = etag_for(response.data)
+    cache.set(key, (response.data, etag), settings.RESPONSE_CACHE_TIMEOUT)
+    return _respond(request, response.data, etag)
+
+
+def stats():
+    """Per-namespace counts and hit rate (304s count as hits)."""
+    keys = [f"respcache:stats:{namespace}:{outcome}" for namespace in NAMESPACES for outcome in OUTCOMES]
+    values = cache.get_many(keys)
+    result = {}
+    for namespace in NAMESPACES:
+        counts = {outcome: values.get(f"respcache:stats:{namespace}:{outcome}", 0) for outcome in OUTCOMES}
+        total = sum(counts.values())
+        counts['hit_rate'] = round((counts['hit'] + counts['not_modified']) / total, 4) if total else None
+        result[namespace] = counts
+    return result
@@ -0,0 +1,217 @@
+"""
+Full-text index over job titles, descriptions and required skills, used by
+the `search` parameter of JobPostViewSet.
+
+SQLite (the default DATABASES config) uses an FTS5 table and PostgreSQL a
+tsvector table with a GIN index. Both are plain tables keyed by job id,
+created after migrate and kept in sync from the JobPost signals; a
+database migrated before they existed gets its table created and filled
+on first use. Other databases fall back to the old icontains filter.
+"""
+import re
+
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+from .models import JobPost
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def job_documents(job_ids):
+    """(id, title, description, skills) rows for the given jobs."""
+    jobs = JobPost.objects.filter(id__in=job_ids).prefetch_related('required_skills')
+    return [
+        (job.id, job.title, job.description, ' '.join(skill.name for skill in job.required_skills.all()))
+        for job in jobs
+    ]
+
+
+class LikeJobSearch:
+    """Unindexed substring search, for databases without a full-text backend."""
+
+    def ensure_schema(self):
+        pass
+
+    def index_jobs(self, job_ids):
+        pass
+
+    def remove_jobs(self, job_ids):
+        pass
+
+    def rebuild(self, batch_size=1000):
+        return 0
+
+    def filter(self, queryset, query):
+        return queryset.filter(Q(title__icontains=query) | Q(description__icontains=query))
+
+    def order_by_relevance(self, queryset, query):
+        return queryset.order_by('-created_at')
+
+
+class IndexedJobSearch:
+    """Shared setup of the table-backed full-text backends."""
+    table = None
+    ready = False
+
+    def ensure_ready(self):
+        # Once per process: the table may predate post_migrate's ensure_schema
+        if not self.ready:
+            if self.table not in connection.introspection.table_names():
+                self.rebuild()
+            self.ready = True
+
+
+class SQLiteJobSearch(IndexedJobSearch):
+    table = 'core_jobpost_fts'
+    # bm25 column weights: title, description, skills
+    weights = (10.0, 1.0, 5.0)
+
+    def ensure_schema(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+                "USING fts5(title, description, skills, tokenize='porter unicode61')"
+            )
+
+    def index_jobs(self, job_ids):
+        self.ensure_ready()
+        rows = job_documents(job_ids)
+        with connection.cursor() as cursor:
+            self._delete(cursor, job_ids)
+            cursor.executemany(f"INSERT INTO {self.table} (rowid, title, description, skills) VALUES (%s, %s, %s, %s)", rows)
+
+    def remove_jobs(self, job_ids):
+        self.ensure_ready()
+        with connection.cursor() as cursor:
+            self._delete(cursor, job_ids)
+
+    def _delete(self, cursor, job_ids):
+        job_ids = list(job_ids)
+        if job_ids:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid IN ({', '.join(['%s'] * len(job_ids))})", job_ids)
+
+    def rebuild(self, batch_size=1000):
+        self.ensure_schema()
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+        ids = list(JobPost.objects.values_list('id', flat=True))
+        for i in range(0, len(ids), batch_size):
+            self.index_jobs(ids[i:i + batch_size])
+        return len(ids)
+
+    def match_expression(self, query):
+        # Quoted prefix terms: safe against FTS syntax and matches as the user types
+        return ' '.join(f'"{term}"*' for term in search_terms(query))
+
+    def filter(self, queryset, query):
+        self.ensure_ready()
+        match = self.match_expression(query)
+        if not match:
+            return LikeJobSearch().filter(queryset, query)
+        return queryset.filter(id__in=RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [match]))
+
+    def order_by_relevance(self, queryset, query):
+        self.ensure_ready()
+        match = self.match_expression(query)
+        if not match:
+            return queryset.order_by('-created_at')
+        # Materialized so the MATCH runs once per query rather than once per
+        # job (FTS5 re-runs it for every rowid lookup); bm25 is lower for
+        # better matches
+        rank = RawSQL(
+            f"WITH ranked AS MATERIALIZED ("
+            f"SELECT rowid AS job_id, bm25({self.table}, %s, %s, %s) AS score "
+            f"FROM {self.table} WHERE {self.table} MATCH %s"
+            f") SELECT score FROM ranked WHERE job_id = {JobPost._meta.db_table}.id",
+            [*self.weights, match],
+        )
+        return queryset.annotate(search_rank=rank).order_by('search_rank', '-created_at')
+
+
+class PostgresJobSearch(IndexedJobSearch):
+    table = 'core_jobpost_search'
+    document = (
+        "setweight(to_tsvector('english', %s), 'A') || "
+        "setweight(to_tsvector('english', %s), 'B') || "
+        "setweight(to_tsvector('english', %s), 'C')"
+    )
+
+    def ensure_schema(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                f"job_id bigint PRIMARY KEY REFERENCES {JobPost._meta.db_table}(id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_document_idx ON {self.table} USING GIN (document)")
+
+    def index_jobs(self, job_ids):
+        self.ensure_ready()
+        rows = [(job_id, title, skills, description) for job_id, title, description, skills in job_documents(job_ids)]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.table} (job_id, document) VALUES (%s, {self.document}) "
+                "ON CONFLICT (job_id) DO UPDATE SET document = EXCLUDED.document",
+                rows,
+            )
+
+    def remove_jobs(self, job_ids):
+        pass # ON DELETE CASCADE
+
+    def rebuild(self, batch_size=1000):
+        self.ensure_schema()
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {self.table}")
+        ids = list(JobPost.objects.values_list('id', flat=True))
+        for i in range(0, len(ids), batch_size):
+            self.index_jobs(ids[i:i + batch_size])
+        return len(ids)
+
+    def match_expression(self, query):
+        return ' & '.join(f"{term}:*" for term in search_terms(query))
+
+    def filter(self, queryset, query):
+        self.ensure_ready()
+        match = self.match_expression(query)
+        if not match:
+            return LikeJobSearch().filter(queryset, query)
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT job_id FROM {self.table} WHERE document @@ to_tsquery('english', %s)", [match]
+        ))
+
+    def order_by_relevance(self, queryset, query):
+        self.ensure_ready()
+        match = self.match_expression(query)
+        if not match:
+            return queryset.order_by('-created_at')
+        rank = RawSQL(
+            f"SELECT ts_rank(document, to_tsquery('english', %s)) FROM {self.table} "
+            f"WHERE job_id = {JobPost._meta.db_table}.id",
+            [match],
+        )
+        return queryset.annotate(search_rank=rank).order_by(F('search_rank').desc(nulls_last=True), '-created_at')
+
+
+def sqlite_has_fts5():
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+_backend = None
+
+
+def job_search():
+    """The search backend for the default database."""
+    global _backend
+    if _backend is None:
+        if connection.vendor == 'sqlite' and sqlite_has_fts5():
+            _backend = SQLiteJobSearch()
+        elif connection.vendor == 'postgresql':
+            _backend = PostgresJobSearch()
+        else:
+            _backend = LikeJobSearch()
+    return _backend
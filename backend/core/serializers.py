@@ -1,19 +1,74 @@
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
 from .models import Skill, UserProfile, JobPost, Match, Application, Conversation, Message
+from accounts.models import User
+from .response_cache import invalidate
 
 class SkillSerializer(serializers.ModelSerializer):
     class Meta:
         model = Skill
         fields = '__all__'
 
+# Process-local name -> object cache of common skills (the checkbox list on
+# both dashboards), which rarely change. Cleared by the Skill signals.
+_common_objects = {}
+
+
+def forget_common_objects():
+    _common_objects.clear()
+
+
+class CreatableManyRelatedField(ManyRelatedField):
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        return self.child_relation.resolve_many(data)
+
+
 class CreatableSlugRelatedField(serializers.SlugRelatedField):
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return CreatableManyRelatedField(**list_kwargs)
+
     def to_internal_value(self, data):
-        try:
-            val = data.upper() # Normalize to upper case
-            obj, created = self.get_queryset().get_or_create(**{self.slug_field: val})
-            return obj
-        except (TypeError, ValueError):
+        return self.resolve_many([data])[0]
+
+    def resolve_many(self, values):
+        """
+        Objects for a list of slugs, creating the missing ones: cached
+        common objects first, one query for the rest and one bulk insert
+        for slugs that do not exist yet.
+        """
+        if not all(isinstance(value, str) for value in values):
             self.fail('invalid')
+        slugs = list(dict.fromkeys(value.upper() for value in values)) # Normalize to upper case
+        queryset = self.get_queryset()
+
+        found = {slug: _common_objects[slug] for slug in slugs if slug in _common_objects}
+        missing = [slug for slug in slugs if slug not in found]
+        if missing:
+            found.update(self._fetch(queryset, missing))
+        missing = [slug for slug in slugs if slug not in found]
+        if missing:
+            # bulk_create skips save(), so the slugs are uppercased above.
+            # Conflicts are rows created concurrently; the fetch picks them up.
+            queryset.model.objects.bulk_create(
+                [queryset.model(**{self.slug_field: slug}) for slug in missing], ignore_conflicts=True
+            )
+            found.update(self._fetch(queryset, missing))
+            invalidate('skills') # No post_save to do it
+        return [found[slug] for slug in slugs]
+
+    def _fetch(self, queryset, slugs):
+        objects = {getattr(obj, self.slug_field): obj for obj in queryset.filter(**{f'{self.slug_field}__in': slugs})}
+        _common_objects.update({slug: obj for slug, obj in objects.items() if getattr(obj, 'is_common', False)})
+        return objects
 
 class UserProfileSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)
@@ -25,7 +80,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = UserProfile
-        fields = ['id', 'user', 'skills', 'availability', 'location', 'phone_number', 'locations', 'latitude', 'longitude', 'is_available', 'min_pay', 'max_pay', 'bio']
+        fields = ['id', 'user', 'skills', 'availability', 'location', 'phone_number', 'locations', 'latitude', 'longitude', 'max_travel_km', 'is_available', 'min_pay', 'max_pay', 'bio']
         read_only_fields = ['user']
 
 class JobPostSerializer(serializers.ModelSerializer):
@@ -35,10 +90,12 @@ class JobPostSerializer(serializers.ModelSerializer):
         slug_field='name',
         queryset=Skill.objects.all()
     )
+    # Only present on radius searches
+    distance_km = serializers.FloatField(read_only=True)
 
     class Meta:
         model = JobPost
-        fields = ['id', 'business', 'title', 'description', 'required_skills', 'location', 'latitude', 'longitude', 'address', 'requirements', 'pay_per_day', 'created_at', 'is_active']
+        fields = ['id', 'business', 'title', 'description', 'required_skills', 'location', 'latitude', 'longitude', 'address', 'requirements', 'pay_per_day', 'created_at', 'is_active', 'distance_km']
         read_only_fields = ['business']
 
 class MatchSerializer(serializers.ModelSerializer):
@@ -73,13 +130,34 @@ class MessageSerializer(serializers.ModelSerializer):
 class ConversationSerializer(serializers.ModelSerializer):
     participants = serializers.SlugRelatedField(many=True, read_only=True, slug_field='username')
     last_message = serializers.SerializerMethodField()
+    unread_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Conversation
-        fields = ['id', 'participants', 'last_message', 'updated_at']
+        fields = ['id', 'participants', 'last_message', 'unread_count', 'updated_at']
 
     def get_last_message(self, obj):
+        # ConversationViewSet.get_queryset annotates the latest message
+        if hasattr(obj, 'last_message_id'):
+            if obj.last_message_id is None:
+                return None
+            msg = Message(
+                id=obj.last_message_id,
+                sender=User(username=obj.last_message_sender),
+                content=obj.last_message_content,
+                created_at=obj.last_message_created_at,
+                is_read=obj.last_message_is_read,
+            )
+            return MessageSerializer(msg).data
         msg = obj.messages.last()
         if msg:
             return MessageSerializer(msg).data
         return None
+
+    def get_unread_count(self, obj):
+        if hasattr(obj, 'unread_count'):
+            return obj.unread_count
+        request = self.context.get('request')
+        if not request:
+            return 0
+        return obj.messages.filter(is_read=False).exclude(sender=request.user).count()
@@ -1,25 +1,80 @@
-from django.db.models.signals import post_save, m2m_changed
+from django.db.models.signals import post_save, post_delete, post_migrate, m2m_changed
 from django.dispatch import receiver
-from .models import JobPost, UserProfile
-from .utils import update_matches_for_job, update_matches_for_seeker
+from accounts.models import User
+from .index import seeker_index
+from .response_cache import invalidate, invalidate_job_lists
+from .search import job_search
+from .serializers import forget_common_objects
+from .models import Application, JobPost, Match, Skill, UserProfile
+from .tasks import mark_job_dirty, mark_seeker_dirty
+from .utils import refresh_match_visibility
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    # Profile and job list responses embed the username and role
+    invalidate('profile', f"user:{instance.id}")
+    if instance.role == User.Role.BUSINESS:
+        invalidate_job_lists(instance.id)
 
 @receiver(post_save, sender=JobPost)
-def job_post_saved(sender, instance, created, **kwargs):
-    update_matches_for_job(instance)
+def job_post_saved(sender, instance, created, update_fields=None, **kwargs):
+    job_search().index_jobs([instance.id])
+    invalidate_job_lists(instance.business_id)
+    if not created and (update_fields is None or 'is_active' in update_fields):
+        refresh_match_visibility(Match.objects.filter(job_id=instance.id))
+    mark_job_dirty(instance.id)
 
 @receiver(post_save, sender=UserProfile)
 def user_profile_saved(sender, instance, created, **kwargs):
+    seeker_index.schedule_refresh(instance.id)
+    invalidate('profile', f"user:{instance.user_id}")
+    if not created:
+        # Availability toggles show or hide the seeker's matches right away
+        refresh_match_visibility(Match.objects.filter(seeker_id=instance.user_id))
     # Only update if profile is actually populated
-    if instance.location:
-        update_matches_for_seeker(instance)
+    if instance.location or instance.max_travel_km:
+        mark_seeker_dirty(instance.id)
 
 # Also listen for M2M changes on skills
 @receiver(m2m_changed, sender=JobPost.required_skills.through)
 def job_skills_changed(sender, instance, action, **kwargs):
     if action in ["post_add", "post_remove", "post_clear"]:
-        update_matches_for_job(instance)
+        job_search().index_jobs([instance.id])
+        invalidate_job_lists(instance.business_id)
+        mark_job_dirty(instance.id)
 
 @receiver(m2m_changed, sender=UserProfile.skills.through)
 def profile_skills_changed(sender, instance, action, **kwargs):
     if action in ["post_add", "post_remove", "post_clear"]:
-        update_matches_for_seeker(instance)
+        seeker_index.schedule_refresh(instance.id)
+        invalidate('profile', f"user:{instance.user_id}")
+        mark_seeker_dirty(instance.id)
+
+@receiver(post_delete, sender=UserProfile)
+def user_profile_deleted(sender, instance, **kwargs):
+    seeker_index.remove_seeker(instance.user_id)
+    invalidate('profile', f"user:{instance.user_id}")
+
+@receiver(post_delete, sender=JobPost)
+def job_post_deleted(sender, instance, **kwargs):
+    job_search().remove_jobs([instance.id])
+    invalidate_job_lists(instance.business_id)
+
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=Application)
+def application_changed(sender, instance, **kwargs):
+    # Applied jobs drop out of the seeker's match feed
+    refresh_match_visibility(Match.objects.filter(job_id=instance.job_id, seeker_id=instance.seeker_id))
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def skill_changed(sender, instance, **kwargs):
+    invalidate('skills')
+    forget_common_objects()
+
+@receiver(post_migrate)
+def create_search_index(sender, app_config, **kwargs):
+    if app_config.name == 'core':
+        job_search().ensure_schema()
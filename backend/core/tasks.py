@@ -0,0 +1,159 @@
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from .index import seeker_index
+from .models import MatchTask, JobPost, UserProfile
+from .utils import update_matches_for_jobs, update_matches_for_seeker
+
+# How many times each (kind, object_id) left a dirty set to be recomputed.
+# Tests can clear() it and assert a single save dispatches each id once.
+dispatch_counts = Counter()
+
+_local = threading.local()
+
+
+def enqueue(kind, object_ids):
+    """
+    Persists recompute work items. A pending item for the same object is
+    already enough, so duplicates collapse into it; its failure count starts
+    over, since the new change may have fixed what made it fail.
+    """
+    MatchTask.objects.bulk_create(
+        [MatchTask(kind=kind, object_id=object_id) for object_id in object_ids],
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['attempts', 'last_error'],
+    )
+
+
+def schedule(kind, object_ids):
+    """
+    Queues the recomputations, or runs them right away when
+    MATCH_RECOMPUTE_ASYNC is off.
+    """
+    dispatch_counts.update((kind, object_id) for object_id in object_ids)
+    if settings.MATCH_RECOMPUTE_ASYNC:
+        enqueue(kind, object_ids)
+    else:
+        run_tasks(kind, object_ids)
+
+
+class DirtySet:
+    """
+    Job and seeker ids marked inside one transaction or savepoint. Flushed
+    once on commit, so the post_save and m2m_changed signals of a single save
+    share one recompute per object. Its flush is registered with on_commit
+    when the set is started, so a rollback discards the callback and with
+    it the ids.
+    """
+    def __init__(self, savepoint):
+        self.savepoint = savepoint
+        self.ids = {MatchTask.Kind.JOB: set(), MatchTask.Kind.SEEKER: set()}
+        self.flushed = False
+
+    def is_live(self, connection):
+        # Waiting for its commit: not run yet (captureOnCommitCallbacks runs
+        # callbacks but leaves them queued) and not dropped by a rollback
+        return not self.flushed and any(func == self.flush for _, func, _ in connection.run_on_commit)
+
+    def flush(self):
+        self.flushed = True
+        for kind, object_ids in self.ids.items():
+            if object_ids:
+                schedule(kind, sorted(object_ids))
+
+
+def _mark_dirty(kind, object_ids):
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        schedule(kind, sorted(set(object_ids))) # Nothing to coalesce with
+        return
+
+    # Sets of transactions or savepoints rolled back since are dropped here
+    live = _local.dirty = [dirty for dirty in getattr(_local, 'dirty', []) if dirty.is_live(connection)]
+    new_ids = {object_id for object_id in object_ids if not any(object_id in dirty.ids[kind] for dirty in live)}
+    if not new_ids:
+        return
+    savepoint = connection.savepoint_ids[-1] if connection.savepoint_ids else None
+    dirty = next((dirty for dirty in live if dirty.savepoint == savepoint), None)
+    if dirty is None:
+        dirty = DirtySet(savepoint)
+        live.append(dirty)
+        transaction.on_commit(dirty.flush)
+    dirty.ids[kind].update(new_ids)
+
+
+def mark_job_dirty(job_id):
+    _mark_dirty(MatchTask.Kind.JOB, [job_id])
+
+
+def mark_jobs_dirty(job_ids):
+    _mark_dirty(MatchTask.Kind.JOB, job_ids)
+
+
+def mark_seeker_dirty(profile_id):
+    _mark_dirty(MatchTask.Kind.SEEKER, [profile_id])
+
+
+def run_tasks(kind, object_ids):
+    """
+    Runs work items of one kind; jobs are matched together in batches.
+    Objects deleted since the task was queued are skipped; their matches
+    are already gone through the cascade.
+    """
+    if kind == MatchTask.Kind.JOB:
+        jobs = list(JobPost.objects.filter(id__in=object_ids))
+        if jobs:
+            update_matches_for_jobs(jobs)
+    else:
+        for object_id in object_ids:
+            # Seeker changes usually come from the web process, so bring this
+            # process's index up to date before matching against it.
+            seeker_index.refresh_seeker(object_id)
+            profile = UserProfile.objects.filter(id=object_id).first()
+            if profile:
+                update_matches_for_seeker(profile)
+
+
+def run_pending(limit=100):
+    """
+    Claims and runs up to `limit` pending tasks, oldest first.
+    A task is claimed by deleting its row, so a change that arrives while it
+    runs queues a fresh task instead of being swallowed, and concurrent
+    workers never run the same row twice. Claimed job tasks run as one
+    batch; if the batch fails its jobs are rerun one by one to find the
+    failing ones. A failed task is queued again with attempts raised and the
+    error recorded, until MATCH_TASK_MAX_ATTEMPTS leaves it unclaimed as a
+    dead letter. Returns (run, failed) counts.
+    """
+    claimed = {MatchTask.Kind.JOB: {}, MatchTask.Kind.SEEKER: {}}
+    with transaction.atomic(): # One commit for the whole claim
+        for task in MatchTask.objects.filter(attempts__lt=settings.MATCH_TASK_MAX_ATTEMPTS)[:limit]:
+            deleted, _ = MatchTask.objects.filter(id=task.id).delete()
+            if deleted: # Otherwise another worker got it first
+                claimed[task.kind][task.object_id] = task
+
+    failed = []
+    for kind, tasks in claimed.items():
+        if not tasks:
+            continue
+        try:
+            run_tasks(kind, list(tasks))
+        except Exception:
+            for object_id, task in tasks.items():
+                try:
+                    run_tasks(kind, [object_id])
+                except Exception as e:
+                    task.attempts += 1
+                    task.last_error = f"{type(e).__name__}: {e}"
+                    failed.append(task)
+
+    # A fresh task queued for the object meanwhile takes precedence
+    MatchTask.objects.bulk_create([
+        MatchTask(kind=task.kind, object_id=task.object_id, attempts=task.attempts, last_error=task.last_error)
+        for task in failed
+    ], ignore_conflicts=True)
+    run = sum(len(tasks) for tasks in claimed.values())
+    return run - len(failed), len(failed)
@@ -1,3 +1,505 @@
-from django.test import TestCase
+import random
+import threading
+import unittest
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from accounts.models import User
+from .benchmarks import create_fixtures
+from .bulk import import_jobs
+from .hiring import JobClosed, accept_application
+from .index import SeekerIndex, bump_generation, seeker_index
+from .messaging import get_or_create_direct_conversation, unread_message_count
+from .search import IndexedJobSearch, job_search
+from .models import Application, JobPost, Match, MatchTask, Message, Skill, UnreadCounter, UserProfile
+from .tasks import DirtySet, dispatch_counts, enqueue, mark_job_dirty, run_pending
+from .utils import SeekerMatrix, calculate_match_score, score_job_against_seekers
+
+
+class DirtySetDispatchTests(TestCase):
+    """One save fires several signals; each object is recomputed once."""
+
+    def setUp(self):
+        Skill.objects.create(name='COOK')
+        self.business = User.objects.create_user(username='biz', email='biz@example.com', role=User.Role.BUSINESS)
+        self.seeker = User.objects.create_user(username='seeker', email='seeker@example.com', role=User.Role.SEEKER)
+        self.client = APIClient()
+        dispatch_counts.clear()
+
+    def create_job(self, title):
+        self.client.force_authenticate(self.business)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/jobs/', {
+                'title': title, 'description': 'd', 'location': 'Pune', 'required_skills': ['cook', 'waiter'],
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def test_job_create_dispatches_once(self):
+        job_id = self.create_job('Cook')
+        self.assertEqual(dispatch_counts, {(MatchTask.Kind.JOB, job_id): 1})
+
+    def test_consecutive_transactions_each_dispatch(self):
+        first = self.create_job('Cook')
+        second = self.create_job('Waiter')
+        self.assertEqual(dispatch_counts, {(MatchTask.Kind.JOB, first): 1, (MatchTask.Kind.JOB, second): 1})
+
+    def test_rolled_back_marks_are_dropped(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                mark_job_dirty(12345)
+                raise RuntimeError()
+        job_id = self.create_job('Cook')
+        self.assertEqual(dispatch_counts, {(MatchTask.Kind.JOB, job_id): 1})
+
+    def test_rolled_back_savepoint_keeps_outer_marks(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                mark_job_dirty(1)
+                with self.assertRaises(RuntimeError):
+                    with transaction.atomic():
+                        mark_job_dirty(2)
+                        raise RuntimeError()
+                mark_job_dirty(1)
+        self.assertEqual(dispatch_counts, {(MatchTask.Kind.JOB, 1): 1})
+
+    def test_import_flushes_once(self):
+        records = [
+            (line, {'title': f"Job {line}", 'description': 'd', 'location': 'Pune', 'required_skills': ['cook']})
+            for line in range(1, 51)
+        ]
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(import_jobs(self.business, records, chunk_size=20), 50)
+        flushes = [callback for callback in callbacks if getattr(callback, '__func__', None) is DirtySet.flush]
+        self.assertEqual(len(flushes), 1)
+        flushes[0]()
+        job_ids = JobPost.objects.filter(business=self.business).values_list('id', flat=True)
+        self.assertEqual(dispatch_counts, {(MatchTask.Kind.JOB, job_id): 1 for job_id in job_ids})
+
+    def test_profile_patch_dispatches_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = UserProfile.objects.create(user=self.seeker, location='Pune')
+        dispatch_counts.clear()
+        self.client.force_authenticate(self.seeker)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/profile/', {
+                'location': 'Mumbai', 'skills': ['cook'], 'is_available': True,
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(dispatch_counts, {(MatchTask.Kind.SEEKER, profile.id): 1})
+
+    def test_job_patch_dispatches_once(self):
+        job_id = self.create_job('Cook')
+        dispatch_counts.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/jobs/{job_id}/', {'title': 'Chef', 'required_skills': ['chef']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(dispatch_counts, {(MatchTask.Kind.JOB, job_id): 1})
+        self.assertTrue(JobPost.objects.filter(id=job_id, title='Chef').exists())
+
+
+class MatchScorerEquivalenceTests(TestCase):
+    """The vectorized scorers agree exactly with calculate_match_score."""
+
+    SEEDS = [1, 7, 42, 2024]
+    # roughly Mumbai and Pune, about 120 km apart
+    CENTRES = [(19.07, 72.87), (18.52, 73.85)]
+
+    def perturb(self, rng, obj, schedule_field):
+        """
+        Coordinates, null keys, unparseable and wrapping slots on top of the
+        random fixtures, saved so the compiled schedule the scorers read
+        follows.
+        """
+        if rng.random() < 0.5:
+            lat, lng = rng.choice(self.CENTRES)
+            obj.latitude, obj.longitude = lat + rng.uniform(-0.3, 0.3), lng + rng.uniform(-0.3, 0.3)
+        schedule = getattr(obj, schedule_field)
+        roll = rng.random()
+        if roll < 0.05:
+            setattr(obj, schedule_field, {})
+        elif roll < 0.1:
+            schedule['time_slots'] = None
+        elif roll < 0.15:
+            schedule['months'] = None
+        elif roll < 0.2:
+            schedule['time_slots'].append({'start': None, 'end': '10:00'})
+        elif roll < 0.3:
+            schedule['time_slots'].append({'start': 'noon', 'end': '14:00'})
+        elif roll < 0.45:
+            schedule['time_slots'].append({'start': '22:00', 'end': '06:00'})
+        obj.save()
+
+    @staticmethod
+    def compiled_slots(objs, field):
+        return [slot for obj in objs for slot in getattr(obj, field)['slots']]
+
+    def assert_equivalent(self, jobs, profiles):
+        matrix = SeekerMatrix(profiles)
+        for job in jobs:
+            expected = [calculate_match_score(job, profile) for profile in profiles]
+            self.assertEqual(matrix.score(job).tolist(), expected, job.title)
+            self.assertEqual(score_job_against_seekers(job, profiles).tolist(), expected, job.title)
+
+    def test_random_fixtures(self):
+        for seed in self.SEEDS:
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                profiles, jobs = create_fixtures(rng, seekers=60, jobs=25)
+                for profile in profiles:
+                    profile.max_travel_km = rng.choice([None, 0, 10, 50, 200])
+                    self.perturb(rng, profile, 'availability')
+                for job in jobs:
+                    self.perturb(rng, job, 'requirements')
+                # The cases above really reach the scorers
+                for objs, field in [(profiles, 'compiled_availability'), (jobs, 'compiled_requirements')]:
+                    slots = self.compiled_slots(objs, field)
+                    self.assertIn(None, slots)
+                    self.assertTrue(any(slot and slot[1] <= slot[0] for slot in slots))
+                self.assertTrue(any(calculate_match_score(job, profile) for job in jobs for profile in profiles))
+                self.assert_equivalent(jobs, profiles)
+                User.objects.all().delete()
+                Skill.objects.all().delete()
+
+    def test_empty_matrix(self):
+        _, jobs = create_fixtures(random.Random(0), seekers=0, jobs=3)
+        matrix = SeekerMatrix([])
+        self.assertEqual(len(matrix), 0)
+        for job in jobs:
+            self.assertEqual(matrix.score(job).tolist(), [])
+            self.assertEqual(score_job_against_seekers(job, []).tolist(), [])
+
+
+class FeedQueryCountTests(TestCase):
+    """The match and application lists cost the same queries for any page size."""
+
+    # count, page, job skills, seeker profile skills (force_authenticate skips
+    # the session and user lookups)
+    QUERIES = 4
+
+    def setUp(self):
+        self.skill = Skill.objects.create(name='COOK')
+        self.business = User.objects.create_user(username='biz', email='biz@example.com', role=User.Role.BUSINESS)
+        self.seeker = User.objects.create_user(username='seeker', email='seeker@example.com', role=User.Role.SEEKER)
+        UserProfile.objects.create(user=self.seeker, location='Pune').skills.add(self.skill)
+        self.client = APIClient()
+
+    def populate(self, model, rows):
+        """
+        rows jobs of self.business, each paired with its own seeker, and
+        rows jobs of other businesses paired with self.seeker.
+        """
+        for i in range(rows):
+            seeker = User.objects.create_user(username=f"seeker-{i}", email=f"seeker-{i}@example.com", role=User.Role.SEEKER)
+            UserProfile.objects.create(user=seeker, location='Pune').skills.add(self.skill)
+            other = User.objects.create_user(username=f"biz-{i}", email=f"biz-{i}@example.com", role=User.Role.BUSINESS)
+            for business, applicant in [(self.business, seeker), (other, self.seeker)]:
+                job = JobPost.objects.create(business=business, title=f"Job {i}", description='d', location='Pune')
+                job.required_skills.add(self.skill)
+                model.objects.create(job=job, seeker=applicant)
+
+    def assert_list_queries(self, path, model, rows):
+        self.populate(model, rows)
+        for user in (self.business, self.seeker):
+            with self.subTest(role=user.role):
+                self.client.force_authenticate(user)
+                with self.assertNumQueries(self.QUERIES):
+                    response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), rows)
+
+    def test_match_list_one_row(self):
+        self.assert_list_queries('/api/matches/', Match, 1)
+
+    def test_match_list_full_page(self):
+        self.assert_list_queries('/api/matches/', Match, 10)
+
+    def test_application_list_one_row(self):
+        self.assert_list_queries('/api/applications/', Application, 1)
+
+    def test_application_list_full_page(self):
+        self.assert_list_queries('/api/applications/', Application, 10)
+
+
+class UserCacheInvalidationTests(TestCase):
+    """Cached responses embedding a user's name follow renames."""
+
+    def setUp(self):
+        self.business = User.objects.create_user(username='biz', email='biz@example.com', role=User.Role.BUSINESS)
+        self.seeker = User.objects.create_user(username='seeker', email='seeker@example.com', role=User.Role.SEEKER)
+        UserProfile.objects.create(user=self.seeker, location='Pune')
+        with self.captureOnCommitCallbacks(execute=True):
+            JobPost.objects.create(business=self.business, title='Cook', description='d', location='Pune')
+        self.client = APIClient()
+
+    def rename(self, user, username):
+        user.username = username
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+    def test_business_rename_refreshes_job_lists(self):
+        for viewer in (self.seeker, self.business):
+            self.client.force_authenticate(viewer)
+            self.assertEqual(self.client.get('/api/jobs/').data['results'][0]['business'], str(self.business))
+        self.rename(self.business, 'bistro')
+        for viewer in (self.seeker, self.business):
+            self.client.force_authenticate(viewer)
+            self.assertEqual(self.client.get('/api/jobs/').data['results'][0]['business'], str(self.business))
+
+    def test_rename_refreshes_profile(self):
+        self.client.force_authenticate(self.seeker)
+        self.client.get('/api/profile/')
+        self.rename(self.seeker, 'sam')
+        self.assertIn('sam', str(self.client.get('/api/profile/').data))
+
+
+class AcceptApplicationTests(TestCase):
+    """Accepting closes the job once; later or foreign accepts are refused."""
+
+    # lookup and prefetches, the job UPDATE and accepted check, the
+    # accept/reject UPDATEs and match DELETE, the conversation and the
+    # message with its unread counters
+    QUERIES = 22
+
+    def setUp(self):
+        self.business = User.objects.create_user(username='biz', email='biz@example.com', role=User.Role.BUSINESS)
+        UserProfile.objects.create(user=self.business, phone_number='555')
+        self.job = JobPost.objects.create(business=self.business, title='Cook', description='d', location='Pune')
+        self.applications = []
+        for i in range(3):
+            seeker = User.objects.create_user(username=f"seeker-{i}", email=f"seeker-{i}@example.com", role=User.Role.SEEKER)
+            UserProfile.objects.create(user=seeker, location='Pune')
+            self.applications.append(Application.objects.create(job=self.job, seeker=seeker))
+        self.client = APIClient()
+
+    def accept(self, user, application):
+        self.client.force_authenticate(user)
+        return self.client.patch(f'/api/applications/{application.id}/', {'status': 'ACCEPTED'}, format='json')
+
+    def test_accept(self):
+        with self.assertNumQueries(self.QUERIES):
+            response = self.accept(self.business, self.applications[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(JobPost.objects.get(id=self.job.id).is_active)
+        self.assertEqual(
+            dict(Application.objects.values_list('seeker__username', 'status')),
+            {'seeker-0': 'ACCEPTED', 'seeker-1': 'REJECTED', 'seeker-2': 'REJECTED'},
+        )
+        message = Message.objects.get()
+        self.assertEqual(message.sender, self.business)
+        self.assertIn('555', message.content)
+
+    def test_second_accept_conflicts(self):
+        self.assertEqual(self.accept(self.business, self.applications[0]).status_code, 200)
+        response = self.accept(self.business, self.applications[1])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Application.objects.filter(status='ACCEPTED').count(), 1)
+        self.assertEqual(Message.objects.count(), 1)
+
+    def test_accept_on_deactivated_job(self):
+        JobPost.objects.filter(id=self.job.id).update(is_active=False)
+        self.assertEqual(self.accept(self.business, self.applications[0]).status_code, 200)
+        self.assertEqual(Application.objects.filter(status='ACCEPTED').count(), 1)
+
+    def test_foreign_accepts_forbidden(self):
+        other = User.objects.create_user(username='other', email='other@example.com', role=User.Role.BUSINESS)
+        application = self.applications[0]
+        for user in (other, application.seeker):
+            with self.subTest(user=user.username):
+                self.assertEqual(self.accept(user, application).status_code, 403)
+        self.assertTrue(JobPost.objects.get(id=self.job.id).is_active)
+        self.assertFalse(Application.objects.filter(status='ACCEPTED').exists())
+        self.assertFalse(Message.objects.exists())
+
+
+class NullScheduleTests(TestCase):
+    """Schedule keys sent as null compile like missing ones."""
+
+    def setUp(self):
+        self.business = User.objects.create_user(username='biz', email='biz@example.com', role=User.Role.BUSINESS)
+        self.seeker = User.objects.create_user(username='seeker', email='seeker@example.com', role=User.Role.SEEKER)
+        UserProfile.objects.create(user=self.seeker, location='Pune')
+        self.client = APIClient()
+
+    def test_job_with_null_keys(self):
+        self.client.force_authenticate(self.business)
+        response = self.client.post('/api/jobs/', {
+            'title': 'Cook', 'description': 'd', 'location': 'Pune', 'required_skills': ['cook'],
+            'requirements': {'months': None, 'days': None, 'time_slots': None},
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        job = JobPost.objects.get(id=response.data['id'])
+        self.assertEqual(job.compiled_requirements, {'months': 0, 'days': 0, 'slots': []})
+
+    def test_profile_with_null_keys(self):
+        self.client.force_authenticate(self.seeker)
+        response = self.client.patch('/api/profile/', {
+            'availability': {'months': None, 'days': ['Mon'], 'time_slots': [{'start': None, 'end': '10:00'}, {'start': '09:00'}]},
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        profile = UserProfile.objects.get(user=self.seeker)
+        self.assertEqual(profile.compiled_availability, {'months': 0, 'days': 1, 'slots': []})
+
+
+class ConcurrentAcceptTests(TransactionTestCase):
+    """Accepts racing on one job from separate connections: one wins."""
+
+    def test_one_of_concurrent_accepts_wins(self):
+        business = User.objects.create_user(username='biz', email='biz@example.com', role=User.Role.BUSINESS)
+        job = JobPost.objects.create(business=business, title='Cook', description='d', location='Pune')
+        applications = [
+            Application.objects.create(job=job, seeker=User.objects.create_user(
+                username=f"seeker-{i}", email=f"seeker-{i}@example.com", role=User.Role.SEEKER,
+            ))
+            for i in range(4)
+        ]
+        barrier = threading.Barrier(len(applications))
+        outcomes = []
+
+        def accept(application):
+            barrier.wait()
+            try:
+                accept_application(Application.objects.select_related('job', 'seeker').get(id=application.id), business)
+                outcomes.append('accepted')
+            except JobClosed:
+                outcomes.append('closed')
+            except Exception as e:
+                outcomes.append(repr(e))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=accept, args=(application,)) for application in applications]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(outcomes), ['accepted', 'closed', 'closed', 'closed'])
+        self.assertEqual(Application.objects.filter(status='ACCEPTED').count(), 1)
+        self.assertEqual(Message.objects.count(), 1)
+
+
+@override_settings(MATCH_TASK_MAX_ATTEMPTS=3)
+class FailingTaskTests(TestCase):
+    """A task that keeps failing is retried, then dead-lettered."""
+
+    def setUp(self):
+        business = User.objects.create_user(username='biz', email='biz@example.com', role=User.Role.BUSINESS)
+        self.good, self.bad = [
+            JobPost.objects.create(business=business, title=title, description='d', location='Pune')
+            for title in ('Good', 'Bad')
+        ]
+        enqueue(MatchTask.Kind.JOB, [self.good.id, self.bad.id])
+        patcher = mock.patch('core.tasks.update_matches_for_jobs', side_effect=self.update_matches)
+        self.update_matches_for_jobs = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def update_matches(self, jobs):
+        if self.bad in jobs:
+            raise ValueError('bad job')
+
+    def test_retried_until_dead_letter(self):
+        self.assertEqual(run_pending(), (1, 1))
+        task = MatchTask.objects.get()
+        self.assertEqual((task.object_id, task.attempts, task.last_error), (self.bad.id, 1, 'ValueError: bad job'))
+
+        self.assertEqual(run_pending(), (0, 1))
+        self.assertEqual(run_pending(), (0, 1))
+        self.assertEqual(run_pending(), (0, 0)) # Dead letter, no longer claimed
+        self.assertEqual(MatchTask.objects.get().attempts, 3)
+
+        # A new change gives it another go
+        enqueue(MatchTask.Kind.JOB, [self.bad.id])
+        self.assertEqual(MatchTask.objects.get().attempts, 0)
+
+    def test_worker_survives_failure(self):
+        out, err = StringIO(), StringIO()
+        call_command('run_match_worker', '--once', stdout=out, stderr=err)
+        self.assertIn('1 tasks failed', err.getvalue())
+        self.assertIn('Worker finished: 1 tasks', out.getvalue())
+        self.assertIn('3 failed', out.getvalue())
+        self.assertEqual(MatchTask.objects.get().attempts, 3)
+
+
+@override_settings(MATCH_RECOMPUTE_ASYNC=False)
+class StaleSeekerIndexTests(TestCase):
+    """A seeker changed by another process is matched by this one's next job."""
+
+    def setUp(self):
+        self.skill = Skill.objects.create(name='COOK')
+        self.business = User.objects.create_user(username='biz', email='biz@example.com', role=User.Role.BUSINESS)
+        seeker = User.objects.create_user(username='seeker', email='seeker@example.com', role=User.Role.SEEKER)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile = UserProfile.objects.create(user=seeker, location='Mumbai')
+            self.profile.skills.add(self.skill)
+        seeker_index.rebuild()
+
+    def move_elsewhere(self):
+        # What another process's save does: the row changes and the
+        # generation moves, while this process's copy is left as it was
+        UserProfile.objects.filter(id=self.profile.id).update(location='Pune')
+        bump_generation()
+
+    def post_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = JobPost.objects.create(business=self.business, title='Cook', description='d', location='Pune')
+            job.required_skills.add(self.skill)
+        return job
+
+    def test_job_save_after_change_elsewhere(self):
+        self.assertEqual(seeker_index.candidates('pune', [self.skill.id]), set())
+        self.move_elsewhere()
+        job = self.post_job()
+        self.assertTrue(Match.objects.filter(job=job, seeker=self.profile.user).exists())
+
+    def test_rebuild_command_refreshes_running_copies(self):
+        server = SeekerIndex() # Another process's copy
+        server.rebuild()
+        UserProfile.objects.filter(id=self.profile.id).update(location='Pune')
+        call_command('rebuild_match_index', stdout=StringIO())
+        self.assertEqual(server.candidates('pune', [self.skill.id]), {self.profile.user_id})
+
+
+class ReconcileUnreadCountsTests(TestCase):
+    """Repaired totals reach servers whose caches the command can't touch."""
+
+    def test_servers_drop_cached_totals(self):
+        reader = User.objects.create_user(username='reader', email='reader@example.com', role=User.Role.SEEKER)
+        sender = User.objects.create_user(username='sender', email='sender@example.com', role=User.Role.BUSINESS)
+        conversation, _ = get_or_create_direct_conversation(reader, sender)
+        Message.objects.create(conversation=conversation, sender=sender, content='Hi')
+        UnreadCounter.objects.create(user=reader, conversation=conversation, count=5) # Drifted
+
+        with mock.patch('core.messaging.UNREAD_GENERATION_CHECK', 0):
+            self.assertEqual(unread_message_count(reader), 5) # Cached, as on a server
+            # The command runs in its own process, so its local invalidation misses the servers
+            with mock.patch('core.management.commands.reconcile_unread_counts.invalidate_unread_counts'):
+                call_command('reconcile_unread_counts', stdout=StringIO())
+            self.assertEqual(unread_message_count(reader), 1)
+
+
+class MissingSearchTableTests(TestCase):
+    """A database migrated before the search table existed keeps working."""
+
+    def setUp(self):
+        self.backend = job_search()
+        if not isinstance(self.backend, IndexedJobSearch):
+            raise unittest.SkipTest("No full-text backend on this database")
+        self.business = User.objects.create_user(username='biz', email='biz@example.com', role=User.Role.BUSINESS)
+        self.old = JobPost.objects.create(business=self.business, title='Line cook', description='d', location='Pune')
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {self.backend.table}")
+        self.backend.ready = False
+        self.addCleanup(setattr, self.backend, 'ready', False)
+
+    def test_created_and_filled_on_first_use(self):
+        new = JobPost.objects.create(business=self.business, title='Cook', description='d', location='Pune')
+        client = APIClient()
+        client.force_authenticate(self.business)
+        response = client.get('/api/jobs/', {'search': 'cook', 'ordering': 'relevance'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({job['id'] for job in response.data['results']}, {self.old.id, new.id})
@@ -1,7 +1,7 @@
 from django.urls import path, include
 # Core URLs
 from rest_framework.routers import DefaultRouter
-from .views import JobPostViewSet, MatchViewSet, UserProfileView, SkillViewSet, ApplicationViewSet, ConversationViewSet, MessageViewSet
+from .views import JobPostViewSet, MatchViewSet, UserProfileView, SkillViewSet, ApplicationViewSet, ConversationViewSet, MessageViewSet, ResponseCacheStatsView, event_stream
 
 router = DefaultRouter()
 router.register(r'jobs', JobPostViewSet, basename='job')
@@ -14,4 +14,6 @@ router.register(r'messages', MessageViewSet, basename='message')
 urlpatterns = [
     path('', include(router.urls)),
     path('profile/', UserProfileView.as_view(), name='profile'),
+    path('events/', event_stream, name='events'),
+    path('cache-stats/', ResponseCacheStatsView.as_view(), name='cache-stats'),
 ]
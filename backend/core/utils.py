@@ -1,5 +1,11 @@
-from django.db.models import Q
-from .models import Match, UserProfile, JobPost
+import numpy as np
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, prefetch_related_objects
+from .availability import (
+    DAY_BITS, MONTH_BITS, compile_schedule, interval_contained, mask_contains, schedule_fits, time_to_minutes,
+)
+from .geo import cos_within, distance_bonus, dot, unit_vector, BONUS_THRESHOLDS
+from .index import normalize_cities, seeker_index
+from .models import Application, Match, UserProfile, JobPost
 from accounts.models import User
 
 def check_containment(req_list, avail_list):
@@ -19,13 +25,6 @@ def check_containment(req_list, avail_list):
     return req_set.issubset(avail_set)
 
 
-def time_to_minutes(t_str):
-    try:
-        h, m = map(int, t_str.split(':'))
-        return h * 60 + m
-    except (ValueError, AttributeError, TypeError):
-        return None
-
 def is_slot_contained(job_slot, seeker_slot):
     """
     Checks if job_slot fits within seeker_slot, handling 24h wrap-around.
@@ -40,27 +39,24 @@ def is_slot_contained(job_slot, seeker_slot):
     if None in [j_s, j_e, s_s, s_e]:
         return False
 
-    j_wraps = j_e <= j_s
-    s_wraps = s_e <= s_s
-
-    # Case 1: Neither wraps. Simple subset check.
-    if not j_wraps and not s_wraps:
-        return j_s >= s_s and j_e <= s_e
+    return interval_contained(j_s, j_e, s_s, s_e)
 
-    # Case 2: Job wraps but Seeker doesn't. Impossible to fit.
-    if j_wraps and not s_wraps:
-        return False
+def job_schedule(job):
+    # Rows saved before compilation was added still hold an empty dict
+    return job.compiled_requirements or compile_schedule(job.requirements)
 
-    # Case 3: Job doesn't wrap, but Seeker does (e.g., job 1am-3am, seeker 11pm-5am)
-    if not j_wraps and s_wraps:
-        # Job must be entirely in the first part (after s_s) or second part (before s_e)
-        return j_s >= s_s or j_e <= s_e
+def seeker_schedule(profile):
+    return profile.compiled_availability or compile_schedule(profile.availability)
 
-    # Case 4: Both wrap. Both cross midnight.
-    if j_wraps and s_wraps:
-        return j_s >= s_s and j_e <= s_e
-
-    return False
+def skill_ids(obj, field):
+    """
+    Ids of a job's or profile's skills. Reads the prefetch cache directly
+    when present, which skips building a related manager per pair.
+    """
+    skills = getattr(obj, '_prefetched_objects_cache', {}).get(field)
+    if skills is None:
+        skills = getattr(obj, field).all()
+    return {skill.id for skill in skills}
 
 def calculate_match_score(job, profile):
 
@@ -68,17 +64,27 @@ def calculate_match_score(job, profile):
     Calculates match score. Returns 0 if hard requirements not met.
     """
     # 1. Location Check (Hard)
-    job_city = job.location.strip().lower()
-    seeker_cities = [loc.strip().lower() for loc in (profile.locations or [])]
-    if profile.location:
-        seeker_cities.append(profile.location.strip().lower())
-    
-    if job_city not in seeker_cities:
-        return 0.0
+    # Distance decides when both sides have coordinates and the seeker set
+    # a travel limit, the city lists otherwise
+    job_point = unit_vector(job.latitude, job.longitude)
+    seeker_point = unit_vector(profile.latitude, profile.longitude)
+    cosine = dot(job_point, seeker_point) if job_point and seeker_point else None
+
+    if cosine is not None and profile.max_travel_km:
+        if cosine < cos_within(profile.max_travel_km):
+            return 0.0
+    else:
+        job_city = job.location.strip().lower()
+        seeker_cities = [loc.strip().lower() for loc in (profile.locations or [])]
+        if profile.location:
+            seeker_cities.append(profile.location.strip().lower())
+
+        if job_city not in seeker_cities:
+            return 0.0
 
     # 2. Skills Check (Hard)
-    job_skills = set(job.required_skills.all())
-    profile_skills = set(profile.skills.all())
+    job_skills = skill_ids(job, 'required_skills')
+    profile_skills = skill_ids(profile, 'skills')
     
     if job_skills:
         intersection = job_skills.intersection(profile_skills)
@@ -87,40 +93,11 @@ def calculate_match_score(job, profile):
     else:
         intersection = set()
 
-    # 3. Availability Check (Months & Days) (Hard)
-    job_req = job.requirements or {}
-    profile_avail = profile.availability or {}
-    
-    req_months = job_req.get('months', [])
-    avail_months = profile_avail.get('months', [])
-    if req_months and not check_containment(req_months, avail_months):
-        return 0.0
-        
-    req_days = job_req.get('days', [])
-    avail_days = profile_avail.get('days', [])
-    if req_days and not check_containment(req_days, avail_days):
+    # 3. Availability Check (Months, Days & Time Slots) (Hard)
+    if not schedule_fits(job_schedule(job), seeker_schedule(profile)):
         return 0.0
 
-
-    # 4. Time Slots Check (Hard)
-    # Goal: All job slots must fit within at least one seeker slot
-    job_slots = job_req.get('time_slots', [])
-    seeker_slots = profile_avail.get('time_slots', [])
-    
-    if job_slots:
-        if not seeker_slots:
-            return 0.0 # Job requires specific times, seeker specified none
-        
-        for j_slot in job_slots:
-            found_fit = False
-            for s_slot in seeker_slots:
-                if is_slot_contained(j_slot, s_slot):
-                    found_fit = True
-                    break
-            if not found_fit:
-                return 0.0 # This job slot doesn't fit anywhere in seeker's schedule
-
-    # 5. Scoring
+    # 4. Scoring
     score = 10.0 # Base score for meeting all hard requirements
     
     # Bonus for skills
@@ -132,52 +109,297 @@ def calculate_match_score(job, profile):
             score += 5
         if profile.max_pay and job.pay_per_day <= profile.max_pay:
             score += 2
-            
+
+    # Bonus for distance (if both located)
+    if cosine is not None:
+        score += distance_bonus(cosine)
+
     return score
 
 
+class SeekerMatrix:
+    """
+    Column-oriented snapshot of seeker profiles (skills prefetched) for
+    scoring jobs in bulk: a city membership matrix, a skill bitset matrix,
+    month/day bitmasks, padded slot interval arrays and pay bounds.
+    Build it once and call score() for every job to be matched.
+    """
+    def __init__(self, profiles):
+        profiles = list(profiles)
+        n = len(profiles)
+        self.user_ids = np.array([profile.user_id for profile in profiles], dtype=np.int64)
+        self.schedules = [seeker_schedule(profile) for profile in profiles]
+
+        seeker_cities = [normalize_cities(profile.location, profile.locations) for profile in profiles]
+        self.city_columns = {city: i for i, city in enumerate(sorted(set().union(*seeker_cities)))}
+        self.cities = np.zeros((n, len(self.city_columns)), dtype=bool)
+        for row, cities in enumerate(seeker_cities):
+            self.cities[row, [self.city_columns[city] for city in cities]] = True
+
+        seeker_skills = [skill_ids(profile, 'skills') for profile in profiles]
+        self.skill_columns = {skill: i for i, skill in enumerate(sorted(set().union(*seeker_skills)))}
+        self.skills = np.zeros((n, len(self.skill_columns)), dtype=bool)
+        for row, skills in enumerate(seeker_skills):
+            self.skills[row, [self.skill_columns[skill] for skill in skills]] = True
+
+        # Lists outside the month/day vocabulary stay 0 here and are
+        # checked row by row against self.schedules instead.
+        self.masks = {}
+        self.mask_fallback_rows = {}
+        for key in ('months', 'days'):
+            values = [schedule[key] for schedule in self.schedules]
+            self.masks[key] = np.array([v if isinstance(v, int) else 0 for v in values], dtype=np.int64)
+            self.mask_fallback_rows[key] = [row for row, v in enumerate(values) if not isinstance(v, int)]
+
+        width = max((len(schedule['slots']) for schedule in self.schedules), default=0)
+        self.has_slots = np.array([bool(schedule['slots']) for schedule in self.schedules], dtype=bool)
+        self.slot_start = np.zeros((n, width), dtype=np.int64)
+        self.slot_end = np.zeros((n, width), dtype=np.int64)
+        self.slot_valid = np.zeros((n, width), dtype=bool)
+        for row, schedule in enumerate(self.schedules):
+            for col, slot in enumerate(schedule['slots']):
+                if slot is not None:
+                    self.slot_start[row, col], self.slot_end[row, col] = slot
+                    self.slot_valid[row, col] = True
+
+        self.min_pay = np.array([profile.min_pay or 0 for profile in profiles], dtype=np.int64)
+        self.max_pay = np.array([profile.max_pay or 0 for profile in profiles], dtype=np.int64)
+
+        # Unit vectors are computed with math, as in calculate_match_score,
+        # so the dot products below match it exactly
+        points = [unit_vector(profile.latitude, profile.longitude) for profile in profiles]
+        self.located = np.array([point is not None for point in points], dtype=bool)
+        self.points = np.array([point or (0.0, 0.0, 0.0) for point in points], dtype=np.float64).reshape(n, 3)
+        self.travel_limited = np.array([bool(profile.max_travel_km) for profile in profiles], dtype=bool) & self.located
+        self.travel_cos = np.array([
+            cos_within(profile.max_travel_km) if profile.max_travel_km else -1.0 for profile in profiles
+        ], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def _mask_ok(self, required, key, bits):
+        if not required:
+            return np.ones(len(self), dtype=bool)
+        if not isinstance(required, int):
+            return np.array([mask_contains(required, schedule[key], bits) for schedule in self.schedules], dtype=bool)
+        masks = self.masks[key]
+        ok = (masks == 0) | ((masks & required) == required)
+        for row in self.mask_fallback_rows[key]:
+            ok[row] = mask_contains(required, self.schedules[row][key], bits)
+        return ok
+
+    def _slots_ok(self, job_slots):
+        ok = self.has_slots.copy()
+        s_wraps = self.slot_end <= self.slot_start
+        for slot in job_slots:
+            if slot is None:
+                return np.zeros(len(self), dtype=bool)
+            j_s, j_e = slot
+            starts_after = j_s >= self.slot_start
+            ends_before = j_e <= self.slot_end
+            if j_e <= j_s:
+                # A wrapping job only fits a wrapping seeker slot
+                fits = s_wraps & starts_after & ends_before
+            else:
+                fits = np.where(s_wraps, starts_after | ends_before, starts_after & ends_before)
+            ok &= (fits & self.slot_valid).any(axis=1)
+        return ok
+
+    def score(self, job):
+        """
+        calculate_match_score for the job against every seeker in the
+        matrix, as a float array aligned with user_ids.
+        """
+        return self.score_facts(
+            job.location.strip().lower(),
+            skill_ids(job, 'required_skills'),
+            job_schedule(job),
+            job.pay_per_day,
+            unit_vector(job.latitude, job.longitude),
+        )
+
+    def score_facts(self, city, job_skills, req, pay_per_day, point=None):
+        """
+        score() from already extracted job attributes: the normalized city,
+        required skill ids, compiled requirements, pay and unit vector.
+        """
+        n = len(self)
+        column = self.city_columns.get(city)
+        ok = self.cities[:, column].copy() if column is not None else np.zeros(n, dtype=bool)
+        if point is not None:
+            x, y, z = point
+            cosine = self.points[:, 0] * x + self.points[:, 1] * y + self.points[:, 2] * z
+            ok = np.where(self.travel_limited, cosine >= self.travel_cos, ok)
+        if not ok.any():
+            return np.zeros(n)
+
+        columns = [self.skill_columns[skill] for skill in job_skills if skill in self.skill_columns]
+        overlap = self.skills[:, columns].sum(axis=1)
+        if job_skills:
+            ok &= overlap > 0
+
+        ok &= self._mask_ok(req['months'], 'months', MONTH_BITS)
+        ok &= self._mask_ok(req['days'], 'days', DAY_BITS)
+        if req['slots']:
+            ok &= self._slots_ok(req['slots'])
+
+        score = 10.0 + overlap * 5
+        if pay_per_day:
+            score += np.where((self.min_pay > 0) & (pay_per_day >= self.min_pay), 5, 0)
+            score += np.where((self.max_pay > 0) & (pay_per_day <= self.max_pay), 2, 0)
+        if point is not None:
+            bonus = sum((cosine > threshold).astype(np.int64) for threshold in BONUS_THRESHOLDS)
+            score += np.where(self.located, bonus, 0)
+        return np.where(ok, score, 0.0)
+
+
+def score_job_against_seekers(job, profiles):
+    """
+    Vectorized calculate_match_score of one job against many profiles.
+    Returns a float array aligned with profiles.
+    """
+    return SeekerMatrix(profiles).score(job)
+
+
+def candidate_seekers_for_job(job, check_fresh=True):
+    """
+    Ids of the seekers that can plausibly match the job, from intersecting
+    the city (and nearby travel cell) and skill posting lists of the seeker
+    index. The schedule checks run in the scorer.
+    """
+    skill_list = list(skill_ids(job, 'required_skills'))
+    return seeker_index.candidates(job.location.strip().lower(), skill_list, job.latitude, job.longitude, check_fresh)
+
+
+def load_candidates(user_ids, chunk_size=5000):
+    """
+    Profiles for candidate ids. Role and availability are re-checked in the
+    database so a stale index never yields a false match.
+    """
+    user_ids = sorted(user_ids)
+    profiles = []
+    for i in range(0, len(user_ids), chunk_size):
+        profiles.extend(UserProfile.objects.filter(
+            user_id__in=user_ids[i:i + chunk_size],
+            user__role=User.Role.SEEKER,
+            is_available=True,
+        ).prefetch_related('skills'))
+    return profiles
+
+
+def refresh_match_visibility(matches):
+    """
+    Recomputes Match.visible for a queryset of matches in one UPDATE: the
+    job is active, the seeker is available and has not applied to it.
+    """
+    return matches.update(visible=ExpressionWrapper(
+        Exists(JobPost.objects.filter(id=OuterRef('job_id'), is_active=True))
+        & Exists(UserProfile.objects.filter(user_id=OuterRef('seeker_id'), is_available=True))
+        & ~Exists(Application.objects.filter(job_id=OuterRef('job_id'), seeker_id=OuterRef('seeker_id'))),
+        output_field=BooleanField(),
+    ))
+
+
+def sync_matches(scope, desired, dry_run=False, chunk_size=10000):
+    """
+    Makes the matches in scope equal to desired, a {(job_id, seeker_id): score}
+    dict. Existing rows are read once, then new rows are upserted (and their
+    visibility set), changed scores updated and stale rows deleted in one
+    query each (large deletes are chunked to stay under the database's
+    parameter limit).
+    Returns (created, updated, deleted) counts; dry_run only counts.
+    """
+    existing = {
+        (match.job_id, match.seeker_id): match
+        for match in scope.only('id', 'job_id', 'seeker_id', 'score')
+    }
+
+    to_create = [
+        Match(job_id=job_id, seeker_id=seeker_id, score=score)
+        for (job_id, seeker_id), score in desired.items()
+        if (job_id, seeker_id) not in existing
+    ]
+    to_update = []
+    stale_ids = []
+    for key, match in existing.items():
+        if key not in desired:
+            stale_ids.append(match.id)
+        elif match.score != desired[key]:
+            match.score = desired[key]
+            to_update.append(match)
+
+    if dry_run:
+        return len(to_create), len(to_update), len(stale_ids)
+
+    if to_create:
+        # update_conflicts covers rows created concurrently since the read above
+        Match.objects.bulk_create(
+            to_create,
+            update_conflicts=True,
+            unique_fields=['job', 'seeker'],
+            update_fields=['score'],
+        )
+        # New rows default to visible; hide the ones for closed jobs or applied seekers
+        refresh_match_visibility(scope.filter(visible=True))
+    if to_update:
+        Match.objects.bulk_update(to_update, ['score'])
+    for i in range(0, len(stale_ids), chunk_size):
+        Match.objects.filter(id__in=stale_ids[i:i + chunk_size]).delete()
+
+    return len(to_create), len(to_update), len(stale_ids)
+
+
 def update_matches_for_job(job):
     """
     Finds and creates matches for a new/updated job.
     Also removes matches that no longer fit.
     """
-    # Find all seekers
-    seekers = UserProfile.objects.filter(user__role=User.Role.SEEKER)
-    
-    for profile in seekers:
-        score = calculate_match_score(job, profile)
-        if score > 0 and profile.is_available:
-            Match.objects.update_or_create(
-                job=job,
-                seeker=profile.user,
-                defaults={'score': score}
-            )
-        else:
-            # Delete match if it exists but no longer qualifies
-            Match.objects.filter(job=job, seeker=profile.user).delete()
+    return update_matches_for_jobs([job])
+
+def update_matches_for_jobs(jobs, batch_size=500):
+    """
+    update_matches_for_job for many jobs at once: per batch, the union of
+    their candidates is loaded and compiled into one SeekerMatrix and the
+    matches of the whole batch are synced together.
+    """
+    totals = [0, 0, 0]
+    for i in range(0, len(jobs), batch_size):
+        batch = jobs[i:i + batch_size]
+        prefetch_related_objects(batch, 'required_skills')
+
+        # Closed jobs keep no matches: no candidates, so their rows are deleted
+        seeker_index.ensure_fresh()
+        job_candidates = [candidate_seekers_for_job(job, check_fresh=False) if job.is_active else set() for job in batch]
+        matrix = SeekerMatrix(load_candidates(set().union(*job_candidates)))
+        desired = {}
+        for job, allowed in zip(batch, job_candidates):
+            if not allowed:
+                continue
+            scores = matrix.score(job)
+            for row in np.flatnonzero(scores > 0):
+                user_id = int(matrix.user_ids[row])
+                # Seekers the pre-filter dropped fall out of desired and lose their match
+                if user_id in allowed:
+                    desired[(job.id, user_id)] = float(scores[row])
+
+        counts = sync_matches(Match.objects.filter(job__in=[job.id for job in batch]), desired)
+        totals = [total + count for total, count in zip(totals, counts)]
+    return tuple(totals)
 
 def update_matches_for_seeker(profile):
     """
     Finds and creates matches for a modified seeker profile.
     Also removes matches that no longer fit.
     """
-    # If seeker is not available, delete all their matches
-    if not profile.is_available:
-        Match.objects.filter(seeker=profile.user).delete()
-        return
-
-    # Find all active jobs
-    jobs = JobPost.objects.filter(is_active=True)
-    
-    for job in jobs:
-        score = calculate_match_score(job, profile)
-        if score > 0:
-            Match.objects.update_or_create(
-                job=job,
-                seeker=profile.user,
-                defaults={'score': score}
-            )
-        else:
-            # Delete match if it exists but no longer qualifies
-            Match.objects.filter(job=job, seeker=profile.user).delete()
+    desired = {}
+    # If seeker is not available, all their matches are deleted
+    if profile.is_available:
+        prefetch_related_objects([profile], 'skills')
+        jobs = JobPost.objects.filter(is_active=True).prefetch_related('required_skills')
+        for job in jobs:
+            score = calculate_match_score(job, profile)
+            if score > 0:
+                desired[(job.id, profile.user_id)] = score
 
+    return sync_matches(Match.objects.filter(seeker_id=profile.user_id), desired)
@@ -1,9 +1,23 @@
 from rest_framework import viewsets, permissions, views, response
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import ensure_csrf_cookie
-from .models import JobPost, UserProfile, Match, Skill, Application, Conversation, Message
+from .models import JobPost, UserProfile, Match, Skill, Application, Conversation, Message, UnreadCounter
 from .serializers import JobPostSerializer, UserProfileSerializer, MatchSerializer, SkillSerializer, ApplicationSerializer, ConversationSerializer, MessageSerializer
+from .bulk import FORMATS, JobImportError, detect_format, export_jobs, import_jobs, read_records
+from .events import stream_events
+from .hiring import accept_application
+from .geo import MAX_RADIUS_KM, within_radius
+from .pagination import KeysetPagination
+from .response_cache import cached_response, stats as response_cache_stats
+from .search import job_search
+from .messaging import get_or_create_direct_conversation, record_messages_read, record_new_message, unread_message_count
 from accounts.models import User
 
 @method_decorator(ensure_csrf_cookie, name='dispatch')
@@ -18,15 +32,17 @@ class SkillViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(is_common=is_common.lower() == 'true')
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, 'skills', None, lambda: super(SkillViewSet, self).list(request, *args, **kwargs))
+
 @method_decorator(ensure_csrf_cookie, name='dispatch')
 class JobPostViewSet(viewsets.ModelViewSet):
     serializer_class = JobPostSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        from django.db.models import Q
         user = self.request.user
-        queryset = JobPost.objects.all()
+        queryset = JobPost.objects.select_related('business').prefetch_related('required_skills')
 
         if user.role == User.Role.BUSINESS:
             queryset = queryset.filter(business=user)
@@ -36,20 +52,29 @@ class JobPostViewSet(viewsets.ModelViewSet):
         # Filtering logic for seekers (and potentially businesses if needed)
         search = self.request.query_params.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) | 
-                Q(description__icontains=search)
-            )
+            queryset = job_search().filter(queryset, search)
 
         skills = self.request.query_params.get('skills')
         if skills:
             skill_list = [s.strip().upper() for s in skills.split(',') if s.strip()]
             if skill_list:
-                queryset = queryset.filter(required_skills__name__in=skill_list).distinct()
+                # EXISTS instead of a join, which needed DISTINCT to undo the fan-out
+                queryset = queryset.filter(Exists(JobPost.required_skills.through.objects.filter(
+                    jobpost=OuterRef('pk'), skill__in=Skill.objects.filter(name__in=skill_list)
+                )))
+
+        # Radius search: near=lat,lng&radius_km=
+        near = self.near_point()
+        if near:
+            queryset = within_radius(queryset, *near)
 
         # Ordering
         ordering = self.request.query_params.get('ordering', '-created_at')
-        if ordering:
+        if ordering == 'relevance' and search:
+            queryset = job_search().order_by_relevance(queryset, search)
+        elif ordering == 'distance' and near:
+            queryset = queryset.order_by('distance_km', '-created_at')
+        elif ordering:
             # Validate ordering fields to prevent errors
             valid_fields = ['created_at', '-created_at', 'pay_per_day', '-pay_per_day', 'title', '-title']
             if ordering in valid_fields:
@@ -59,29 +84,121 @@ class JobPostViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        # Businesses see their own jobs, everyone else the shared active feed
+        user = request.user
+        scope = f"user:{user.id}" if user.role == User.Role.BUSINESS else f"role:{user.role}"
+        return cached_response(request, 'jobs', scope, lambda: super(JobPostViewSet, self).list(request, *args, **kwargs))
+
+    @property
+    def paginator(self):
+        """
+        Page numbers by default; pagination=keyset switches to cursor pages
+        without counts (for the orderings KeysetPagination can seek on).
+        """
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'keyset' and KeysetPagination.supports(params.get('ordering')):
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def near_point(self):
+        """(lat, lng, radius_km) from the query string, or None without `near`."""
+        near = self.request.query_params.get('near')
+        if not near:
+            return None
+        try:
+            lat, lng = (float(part) for part in near.split(','))
+            radius_km = float(self.request.query_params.get('radius_km', 10))
+        except ValueError:
+            raise ValidationError({'error': 'near must be lat,lng and radius_km a number'})
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValidationError({'error': 'near is out of range'})
+        if not 0 < radius_km <= MAX_RADIUS_KM:
+            raise ValidationError({'error': f'radius_km must be between 0 and {MAX_RADIUS_KM}'})
+        return lat, lng, radius_km
+
+    # One transaction per write, so core.tasks coalesces the recomputations
+    # fired by the save and its skills into a single run on commit
+    @transaction.atomic
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        return super().update(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(business=self.request.user)
 
-from .utils import update_matches_for_seeker
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_file(self, request):
+        """Creates jobs from an uploaded CSV or NDJSON `file`, all or nothing."""
+        if request.user.role != User.Role.BUSINESS:
+            return response.Response({"error": "Only businesses can import jobs"}, status=403)
+        upload = request.FILES.get('file')
+        if not upload:
+            return response.Response({"error": "file is required"}, status=400)
+        file_format = request.data.get('format') or detect_format(upload.name, upload.content_type or '')
+        if file_format not in FORMATS:
+            return response.Response({"error": f"format must be one of {', '.join(FORMATS)}"}, status=400)
+
+        try:
+            created = import_jobs(request.user, read_records(upload, file_format))
+        except JobImportError as e:
+            return response.Response({"error": str(e), "records": e.errors}, status=400)
+        return response.Response({"created": created}, status=201)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Streams the business's jobs as NDJSON, one job per line."""
+        if request.user.role != User.Role.BUSINESS:
+            return response.Response({"error": "Only businesses can export jobs"}, status=403)
+        stream = StreamingHttpResponse(export_jobs(request.user), content_type='application/x-ndjson')
+        stream['Content-Disposition'] = 'attachment; filename="jobs.ndjson"'
+        return stream
+
+from .tasks import mark_seeker_dirty
 
 @method_decorator(ensure_csrf_cookie, name='dispatch')
 class UserProfileView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
+        return cached_response(request, 'profile', f"user:{request.user.id}", lambda: self.render_profile(request))
+
+    def render_profile(self, request):
         profile, created = UserProfile.objects.get_or_create(user=request.user)
         serializer = UserProfileSerializer(profile)
         return response.Response(serializer.data)
 
+    @transaction.atomic # Profile and skills changes share one recompute
     def patch(self, request):
         profile, created = UserProfile.objects.get_or_create(user=request.user)
         serializer = UserProfileSerializer(profile, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
-            update_matches_for_seeker(profile)
+            mark_seeker_dirty(profile.id)
             return response.Response(serializer.data)
         return response.Response(serializer.errors, status=400)
 
+class ResponseCacheStatsView(views.APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return response.Response(response_cache_stats())
+
+def with_nested_relations(queryset):
+    # Everything the nested JobPostSerializer / UserProfileSerializer render,
+    # fetched up front so a page costs a fixed number of queries.
+    return queryset.select_related('job__business', 'seeker__profile').prefetch_related(
+        'job__required_skills', 'seeker__profile__skills'
+    )
+
+MAX_TOP_MATCHES = 100
+
 @method_decorator(ensure_csrf_cookie, name='dispatch')
 class MatchViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = MatchSerializer
@@ -89,13 +206,36 @@ class MatchViewSet(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        # Only visible matches: active jobs, available seekers who haven't applied
         if user.role == User.Role.BUSINESS:
-            # Matches for jobs posted by this business, only for available seekers
-            return Match.objects.filter(job__business=user, seeker__profile__is_available=True)
+            queryset = Match.objects.filter(job__business=user, visible=True)
+            job = self.request.query_params.get('job')
+            if job:
+                if not job.isdigit():
+                    raise ValidationError({'error': 'job must be a job id'})
+                queryset = queryset.filter(job_id=job)
         else:
-            # Matches for this seeker, only for active jobs they haven't applied to
-            applied_job_ids = Application.objects.filter(seeker=user).values_list('job_id', flat=True)
-            return Match.objects.filter(seeker=user, job__is_active=True).exclude(job_id__in=applied_job_ids)
+            queryset = Match.objects.filter(seeker=user, visible=True)
+        queryset = queryset.order_by('-score', 'id') # Best first
+
+        min_score = self.request.query_params.get('min_score')
+        if min_score:
+            try:
+                queryset = queryset.filter(score__gte=float(min_score))
+            except ValueError:
+                raise ValidationError({'error': 'min_score must be a number'})
+        return with_nested_relations(queryset)
+
+    def list(self, request, *args, **kwargs):
+        # top=K: the K best matches as a plain list, read straight off the
+        # (job|seeker, -score) feed indexes instead of paging through all rows
+        top = request.query_params.get('top')
+        if top is None:
+            return super().list(request, *args, **kwargs)
+        if not top.isdigit() or not 1 <= int(top) <= MAX_TOP_MATCHES:
+            raise ValidationError({'error': f'top must be between 1 and {MAX_TOP_MATCHES}'})
+        queryset = self.get_queryset()[:int(top)]
+        return response.Response(self.get_serializer(queryset, many=True).data)
 
 @method_decorator(ensure_csrf_cookie, name='dispatch')
 class ApplicationViewSet(viewsets.ModelViewSet):
@@ -104,48 +244,31 @@ class ApplicationViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        if user.role == User.Role.BUSINESS:
+        if user.role == User.Role.BUSINESS and self.action in ('update', 'partial_update'):
+            # Unscoped, so another business's accept is a 403 from perform_update
+            queryset = Application.objects.all()
+        elif user.role == User.Role.BUSINESS:
             # Business sees applications for their jobs
-            return Application.objects.filter(job__business=user)
+            queryset = Application.objects.filter(job__business=user)
         else:
             # Seekers see their own applications
-            return Application.objects.filter(seeker=user)
+            queryset = Application.objects.filter(seeker=user)
+        return with_nested_relations(queryset)
 
     def perform_create(self, serializer):
         serializer.save(seeker=self.request.user)
 
     def perform_update(self, serializer):
-        instance = serializer.save()
-        if instance.status == 'ACCEPTED':
-            # Close the job
-            job = instance.job
-            job.is_active = False
-            job.save()
-
-            # Notify the seeker via chat
-            # Ensure conversation exists
-            business_user = self.request.user
-            seeker_user = instance.seeker
-            
-            # Check for existing conversation
-            conversation = None
-            existing_conversations = Conversation.objects.filter(participants=business_user).filter(participants=seeker_user)
-            if existing_conversations.exists():
-                conversation = existing_conversations.first()
-            else:
-                conversation = Conversation.objects.create()
-                conversation.participants.add(business_user, seeker_user)
-            
-            # Send automated message
-            business_phone = business_user.profile.phone_number
-            Message.objects.create(
-                conversation=conversation,
-                sender=business_user,
-                content=f"Congratulations! Your application for '{job.title}' has been accepted. You can contact the business owner at {business_phone}."
-            )
-
-            # Reject all other candidates
-            Application.objects.filter(job=job).exclude(id=instance.id).filter(status='APPLIED').update(status='REJECTED')
+        if self.request.user.role == User.Role.BUSINESS and serializer.instance.job.business_id != self.request.user.id:
+            raise PermissionDenied("Not an application to your job")
+        if serializer.validated_data.get('status') == 'ACCEPTED' and serializer.instance.status != 'ACCEPTED':
+            if self.request.user.role != User.Role.BUSINESS:
+                raise PermissionDenied("Only the business can accept an application")
+            # Closes the job, rejects the other candidates and notifies the seeker;
+            # a second accept on the same job gets a 409
+            accept_application(serializer.instance, self.request.user)
+        else:
+            serializer.save()
 
 @method_decorator(ensure_csrf_cookie, name='dispatch')
 class ConversationViewSet(viewsets.ModelViewSet):
@@ -153,25 +276,20 @@ class ConversationViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return self.request.user.conversations.all().order_by('-updated_at')
+        user = self.request.user
+        latest = Message.objects.filter(conversation=OuterRef('pk')).order_by('-created_at', '-id')
+        unread = UnreadCounter.objects.filter(conversation=OuterRef('pk'), user=user).values('count')[:1]
+        # Latest message and unread count come from correlated subqueries,
+        # so the polled list is one query plus one for participants.
+        return user.conversations.annotate(
+            last_message_id=Subquery(latest.values('id')[:1]),
+            last_message_sender=Subquery(latest.values('sender__username')[:1]),
+            last_message_content=Subquery(latest.values('content')[:1]),
+            last_message_created_at=Subquery(latest.values('created_at')[:1]),
+            last_message_is_read=Subquery(latest.values('is_read')[:1]),
+            unread_count=Coalesce(Subquery(unread), 0),
+        ).prefetch_related('participants').order_by('-updated_at')
 
-    def perform_create(self, serializer):
-        # Create conversation with specific user if not exists
-        other_username = self.request.data.get('other_user')
-        try:
-            other_user = User.objects.get(username=other_username)
-            # Check if conversation already exists
-            qs = Conversation.objects.filter(participants=self.request.user).filter(participants=other_user)
-            if qs.exists():
-                # If exists, we don't create new, but we can't return object in perform_create easily in ViewSet default flow.
-                # Ideally we should use a custom action or override create.
-                # For simplicity here, we'll just handle it in create method if possible, or just create new. 
-                # Better: Allow Creating a conversation essentially just "Gets" it if it exists.
-                pass
-            serializer.save(participants=[self.request.user, other_user])
-        except User.DoesNotExist:
-             raise serializers.ValidationError("User not found")
-    
     def create(self, request, *args, **kwargs):
         other_username = request.data.get('other_user')
         if not other_username:
@@ -182,15 +300,9 @@ class ConversationViewSet(viewsets.ModelViewSet):
         except User.DoesNotExist:
             return response.Response({"error": "User not found"}, status=404)
 
-        # Check existing
-        qs = Conversation.objects.filter(participants=request.user).filter(participants=other_user)
-        if qs.exists():
-            return response.Response(ConversationSerializer(qs.first()).data)
-        
-        # Create new
-        conversation = Conversation.objects.create()
-        conversation.participants.add(request.user, other_user)
-        return response.Response(ConversationSerializer(conversation).data)
+        # Existing chat with this user, or a new one
+        conversation, _ = get_or_create_direct_conversation(request.user, other_user)
+        return response.Response(ConversationSerializer(conversation, context={'request': request}).data)
 
 
 @method_decorator(ensure_csrf_cookie, name='dispatch')
@@ -207,29 +319,78 @@ class MessageViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
-        count = Message.objects.filter(
-            conversation__participants=request.user,
-            is_read=False
-        ).exclude(sender=request.user).count()
-        return response.Response({'count': count})
+        return response.Response({'count': unread_message_count(request.user)})
+
+    # Most messages returned by one after_id sync call
+    sync_limit = 100
 
     def list(self, request, *args, **kwargs):
+        after_id = request.query_params.get('after_id')
+        if after_id is not None:
+            return self.list_after(request, after_id)
+
         response = super().list(request, *args, **kwargs)
         # Mark messages as read when fetched
         conversation_id = request.query_params.get('conversation')
         if conversation_id:
-             Message.objects.filter(
+             marked = Message.objects.filter(
                 conversation_id=conversation_id,
                 conversation__participants=request.user,
                 is_read=False
             ).exclude(sender=request.user).update(is_read=True)
+             if marked:
+                record_messages_read(Conversation.objects.get(id=conversation_id), request.user, marked)
         return response
 
+    def list_after(self, request, after_id):
+        """
+        Incremental sync: messages newer than after_id in id order, unpaginated
+        up to sync_limit. Only returned unread messages are marked read, so an
+        idle poll is a single (conversation, id) index seek and no UPDATE.
+        """
+        try:
+            after_id = int(after_id)
+        except ValueError:
+            return response.Response({'error': 'after_id must be an integer'}, status=400)
+
+        messages = list(
+            self.get_queryset().filter(id__gt=after_id).select_related('sender').order_by('id')[:self.sync_limit + 1]
+        )
+        has_more = len(messages) > self.sync_limit
+        messages = messages[:self.sync_limit]
+        data = self.get_serializer(messages, many=True).data
+
+        unread_ids = [msg.id for msg in messages if not msg.is_read and msg.sender_id != request.user.id]
+        if unread_ids:
+            marked = Message.objects.filter(id__in=unread_ids, is_read=False).update(is_read=True)
+            record_messages_read(messages[0].conversation, request.user, marked)
+        return response.Response({'results': data, 'has_more': has_more})
+
     def perform_create(self, serializer):
         conversation_id = self.request.data.get('conversation')
         conversation = Conversation.objects.get(id=conversation_id)
         if self.request.user not in conversation.participants.all():
             raise permissions.PermissionDenied("Not a participant")
         
-        serializer.save(sender=self.request.user, conversation=conversation)
-        conversation.save() # Update updated_at
+        with transaction.atomic(): # The message and the unread counters commit together
+            message = serializer.save(sender=self.request.user, conversation=conversation)
+            conversation.save() # Update updated_at
+            record_new_message(message)
+
+
+async def event_stream(request):
+    """
+    Server-sent events carrying new messages, read receipts and unread counts
+    for the logged-in user. Needs an ASGI server (smalljobs_backend.asgi);
+    under WSGI it answers 503 and clients keep polling the REST endpoints.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Event stream requires the ASGI server'}, status=503)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=403)
+
+    stream = StreamingHttpResponse(stream_events(user.id), content_type='text/event-stream')
+    stream['Cache-Control'] = 'no-cache'
+    stream['X-Accel-Buffering'] = 'no' # Don't let nginx buffer the stream
+    return stream
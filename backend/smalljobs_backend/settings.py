@@ -88,10 +88,29 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file rather than in-memory, so tests running several connections
+        # wait on SQLite's locks like the servers do
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
 
+# Cache
+# Local memory is per process; use the file backend (CACHE_BACKEND=
+# django.core.cache.backends.filebased.FileBasedCache, CACHE_LOCATION=<dir>)
+# when several server or worker processes share the data.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'smalljobs'),
+    }
+}
+
+# Seconds a cached skills/jobs/profile response lives; signals drop entries
+# as soon as the underlying rows change, see core.response_cache
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -175,4 +194,23 @@ EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@smalljobs.com')
-
+# When True, account emails wait in the outbox for `python manage.py run_email_worker`;
+# otherwise the outbox is drained right after the request's transaction commits.
+EMAIL_SEND_ASYNC = os.environ.get('EMAIL_SEND_ASYNC', 'True') == 'True'
+# Failed sends are retried after EMAIL_RETRY_BASE_SECONDS, doubling each time, up to EMAIL_MAX_ATTEMPTS.
+EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5))
+EMAIL_RETRY_BASE_SECONDS = int(os.environ.get('EMAIL_RETRY_BASE_SECONDS', 60))
+
+# Match recomputation
+# When True, saves only queue MatchTask rows and `python manage.py run_match_worker` computes the matches.
+MATCH_RECOMPUTE_ASYNC = os.environ.get('MATCH_RECOMPUTE_ASYNC', 'True') == 'True'
+# Failed recomputations are retried by the worker until MATCH_TASK_MAX_ATTEMPTS, then kept as dead letters.
+MATCH_TASK_MAX_ATTEMPTS = int(os.environ.get('MATCH_TASK_MAX_ATTEMPTS', 5))
+# Seconds before a process rebuilds its in-memory seeker index (core.index) from the database;
+# seeker changes from any process make it rebuild before its next lookup anyway.
+MATCH_INDEX_MAX_AGE = int(os.environ.get('MATCH_INDEX_MAX_AGE', 300))
+
+# Real-time events (api/events/) are streamed only when served through ASGI,
+# e.g. `uvicorn smalljobs_backend.asgi:application`. The in-memory broker
+# covers one process; swap it for a broker-backed class when running several.
+EVENTS_BROKER = os.environ.get('EVENTS_BROKER', 'core.events.InMemoryBroker')
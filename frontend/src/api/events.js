@@ -0,0 +1,48 @@
+import api from './axios';
+
+// One shared EventSource for the whole app. It pushes chat events from
+// api/events/ ('message', 'read', 'unread_count') and new match digests
+// ('matches'). When the stream is not
+// live (e.g. backend served over WSGI), callers fall back to polling.
+const EVENTS_URL = `${api.defaults.baseURL}events/`;
+
+let source = null;
+const listeners = new Map();
+
+const open = () => {
+    source = new EventSource(EVENTS_URL, { withCredentials: true });
+    listeners.forEach((handlers, type) => attach(type));
+    source.onerror = () => {
+        // The browser retries on its own unless the server refused the stream
+        if (source.readyState === EventSource.CLOSED) {
+            source = null;
+        }
+    };
+};
+
+const attach = (type) => {
+    source.addEventListener(type, (e) => {
+        const data = JSON.parse(e.data);
+        listeners.get(type)?.forEach(handler => handler(data));
+    });
+};
+
+export const subscribe = (type, handler) => {
+    if (!listeners.has(type)) {
+        listeners.set(type, new Set());
+        if (source) attach(type);
+    }
+    listeners.get(type).add(handler);
+    if (!source) open();
+
+    return () => {
+        listeners.get(type)?.delete(handler);
+        const remaining = [...listeners.values()].some(handlers => handlers.size > 0);
+        if (!remaining && source) {
+            source.close();
+            source = null;
+        }
+    };
+};
+
+export const isLive = () => source?.readyState === EventSource.OPEN;
@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import api from '../api/axios';
+import { subscribe, isLive } from '../api/events';
 
 const MessageBadge = () => {
     const navigate = useNavigate();
@@ -17,8 +18,13 @@ const MessageBadge = () => {
         };
 
         fetchCount();
-        const interval = setInterval(fetchCount, 10000); // Poll every 10 seconds
-        return () => clearInterval(interval);
+        // Counts are pushed over the event stream; poll every 10 seconds only while it is down
+        const unsubscribe = subscribe('unread_count', (event) => setCount(event.count));
+        const interval = setInterval(() => !isLive() && fetchCount(), 10000);
+        return () => {
+            unsubscribe();
+            clearInterval(interval);
+        };
     }, []);
 
     // if (count === 0) return null;
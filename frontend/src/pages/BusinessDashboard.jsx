@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import api from '../api/axios';
+import { subscribe } from '../api/events';
 import { useAuth } from '../context/AuthContext';
 import AvailabilitySelector from '../components/AvailabilitySelector';
 import ProfileIcon from '../components/ProfileIcon';
@@ -44,6 +45,9 @@ const BusinessDashboard = () => {
         fetchProfile();
     }, []);
 
+    // New match digests are announced over the event stream
+    useEffect(() => subscribe('matches', fetchMatches), []);
+
     const fetchProfile = async () => {
         try {
             const { data } = await api.get('profile/');
@@ -101,7 +105,14 @@ const BusinessDashboard = () => {
             fetchApplications();
             alert(`Application ${status.toLowerCase()}!`);
         } catch (e) {
-            alert('Failed to update status');
+            if (e.response?.status === 409) {
+                // Someone else accepted a candidate for this job first
+                alert(e.response.data.detail);
+                fetchJobs();
+                fetchApplications();
+            } else {
+                alert('Failed to update status');
+            }
         }
     };
 
@@ -1,6 +1,7 @@
 import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import api from '../api/axios';
+import { subscribe, isLive } from '../api/events';
 import { useAuth } from '../context/AuthContext';
 import ProfileIcon from '../components/ProfileIcon';
 import SEO from '../components/SEO';
@@ -13,18 +14,41 @@ const Chat = () => {
     const [messages, setMessages] = useState([]);
     const [input, setInput] = useState('');
     const messagesEndRef = useRef(null);
+    const activeIdRef = useRef(null);
+    const lastIdRef = useRef(0);
 
     useEffect(() => {
         fetchConversations();
-        const interval = setInterval(fetchConversations, 5000); // Poll for new conversations/updates
-        return () => clearInterval(interval);
+        // New messages are pushed over the event stream; poll only while it is down
+        const unsubscribe = subscribe('message', fetchConversations);
+        const interval = setInterval(() => !isLive() && fetchConversations(), 5000);
+        return () => {
+            unsubscribe();
+            clearInterval(interval);
+        };
     }, []);
 
     useEffect(() => {
         if (activeConversation) {
+            activeIdRef.current = null;
+            lastIdRef.current = 0;
             fetchMessages(activeConversation.id);
-            const interval = setInterval(() => fetchMessages(activeConversation.id), 3000); // Poll messages
-            return () => clearInterval(interval);
+            const unsubscribeMessages = subscribe('message', (event) => {
+                if (event.conversation === activeConversation.id) {
+                    fetchMessages(activeConversation.id); // Also marks the new message as read
+                }
+            });
+            const unsubscribeRead = subscribe('read', (event) => {
+                if (event.conversation === activeConversation.id) {
+                    setMessages(prev => prev.map(msg => msg.sender === user.username ? { ...msg, is_read: true } : msg));
+                }
+            });
+            const interval = setInterval(() => !isLive() && fetchMessages(activeConversation.id), 3000);
+            return () => {
+                unsubscribeMessages();
+                unsubscribeRead();
+                clearInterval(interval);
+            };
         }
     }, [activeConversation]);
 
@@ -47,10 +71,24 @@ const Chat = () => {
     };
 
     const fetchMessages = async (convId) => {
+        // Only ask for messages newer than the last one we have
+        const afterId = activeIdRef.current === convId ? lastIdRef.current : 0;
+        activeIdRef.current = convId;
         try {
-            const { data } = await api.get(`messages/?conversation=${convId}`);
+            const { data } = await api.get(`messages/?conversation=${convId}&after_id=${afterId}`);
+            if (activeIdRef.current !== convId) return; // Switched conversations meanwhile
             const results = data.results || data;
-            setMessages(results);
+            if (results.length > 0) {
+                lastIdRef.current = Math.max(lastIdRef.current, results[results.length - 1].id);
+                setMessages(prev => {
+                    const base = afterId ? prev : [];
+                    const known = new Set(base.map(msg => msg.id));
+                    return [...base, ...results.filter(msg => !known.has(msg.id))];
+                });
+            } else if (!afterId) {
+                setMessages([]);
+            }
+            if (data.has_more) fetchMessages(convId);
         } catch (e) {
             console.error("Failed to fetch messages");
         }
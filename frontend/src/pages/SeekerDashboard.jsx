@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import api from '../api/axios';
+import { subscribe } from '../api/events';
 import { useAuth } from '../context/AuthContext';
 import AvailabilitySelector from '../components/AvailabilitySelector';
 import ProfileIcon from '../components/ProfileIcon';
@@ -31,12 +32,13 @@ const SeekerDashboard = () => {
     const [isPhoneModalOpen, setIsPhoneModalOpen] = useState(false);
     const [pendingJobId, setPendingJobId] = useState(null);
     const [allJobs, setAllJobs] = useState([]);
-    const [allJobsPage, setAllJobsPage] = useState(1);
+    const [nextJobsUrl, setNextJobsUrl] = useState(null);
     const [hasMoreJobs, setHasMoreJobs] = useState(false);
     const [isLoadingJobs, setIsLoadingJobs] = useState(false);
     const [filters, setFilters] = useState({
         search: '',
         skills: '',
+        radius_km: '',
         ordering: '-created_at'
     });
 
@@ -64,24 +66,36 @@ const SeekerDashboard = () => {
         fetchCommonSkills();
     }, []);
 
-    const fetchAllJobs = async (page = 1, reset = false, currentFilters = filters) => {
+    // New match digests are announced over the event stream
+    useEffect(() => subscribe('matches', fetchMatches), []);
+
+    const fetchAllJobs = async (reset = false, currentFilters = filters) => {
         setIsLoadingJobs(true);
         try {
-            const params = new URLSearchParams();
-            params.append('page', page);
-            if (currentFilters.search) params.append('search', currentFilters.search);
-            if (currentFilters.skills) params.append('skills', currentFilters.skills);
-            if (currentFilters.ordering) params.append('ordering', currentFilters.ordering);
-
-            const { data } = await api.get(`jobs/?${params.toString()}`);
-            // DRF returns { count, next, previous, results }
+            let url = nextJobsUrl;
+            if (reset) {
+                // Cursor pages: each "Load more" continues after the last job shown
+                const params = new URLSearchParams();
+                params.append('pagination', 'keyset');
+                if (currentFilters.search) params.append('search', currentFilters.search);
+                if (currentFilters.skills) params.append('skills', currentFilters.skills);
+                if (currentFilters.radius_km && profile.latitude != null && profile.longitude != null) {
+                    params.append('near', `${profile.latitude},${profile.longitude}`);
+                    params.append('radius_km', currentFilters.radius_km);
+                }
+                if (currentFilters.ordering) params.append('ordering', currentFilters.ordering);
+                url = `jobs/?${params.toString()}`;
+            }
+
+            const { data } = await api.get(url);
+            // DRF returns { next, results } (plus count/previous for relevance and distance ordering)
             if (reset) {
                 setAllJobs(data.results);
             } else {
                 setAllJobs(prev => [...prev, ...data.results]);
             }
             setHasMoreJobs(!!data.next);
-            setAllJobsPage(page);
+            setNextJobsUrl(data.next);
         } catch (e) {
             console.error("Failed to fetch all jobs", e);
         } finally {
@@ -93,11 +107,11 @@ const SeekerDashboard = () => {
     useEffect(() => {
         if (activeTab === 'all') {
             const timeout = setTimeout(() => {
-                fetchAllJobs(1, true);
+                fetchAllJobs(true);
             }, 500);
             return () => clearTimeout(timeout);
         }
-    }, [filters.search, filters.skills, filters.ordering, activeTab]);
+    }, [filters.search, filters.skills, filters.radius_km, filters.ordering, activeTab]);
 
     const fetchCommonSkills = async () => {
         try {
@@ -330,6 +344,20 @@ const SeekerDashboard = () => {
                                         />
                                     </div>
                                 </div>
+
+                                <div>
+                                    <label className="block text-sm font-bold text-gray-400 uppercase tracking-widest mb-1">Max Travel (km)</label>
+                                    <input
+                                        type="number"
+                                        min="1"
+                                        max="100"
+                                        className="w-full p-2 border border-gray-200 rounded-lg focus:ring-2 focus:ring-indigo-100 outline-none shadow-sm"
+                                        value={profile.max_travel_km || ''}
+                                        onChange={(e) => setProfile({ ...profile, max_travel_km: e.target.value })}
+                                        placeholder="Match by city"
+                                    />
+                                    <p className="text-[10px] text-gray-400 mt-1 italic">With a pinned location, jobs within this distance match instead of your cities.</p>
+                                </div>
                                 <button type="submit" className="w-full py-4 bg-indigo-600 text-white rounded-2xl font-black hover:bg-indigo-700 transition shadow-xl shadow-indigo-100 active:scale-[0.98]">
                                     Find Jobs
                                 </button>
@@ -554,7 +582,28 @@ const SeekerDashboard = () => {
                                             <option value="created_at">Oldest</option>
                                             <option value="-pay_per_day">Pay ↓</option>
                                             <option value="pay_per_day">Pay ↑</option>
+                                            {filters.search && <option value="relevance">Best match</option>}
+                                            {filters.radius_km && <option value="distance">Nearest</option>}
                                         </select>
+
+                                        {/* Distance (from the location saved in the profile) */}
+                                        {profile.latitude != null && profile.longitude != null && (
+                                            <select
+                                                className="bg-gray-50 border border-gray-200 px-4 py-3 rounded-xl
+                                                text-sm text-gray-900 cursor-pointer
+                                                focus:outline-none focus:ring-2 focus:ring-indigo-200"
+                                                value={filters.radius_km}
+                                                onChange={(e) =>
+                                                    setFilters(prev => ({ ...prev, radius_km: e.target.value }))
+                                                }
+                                            >
+                                                <option value="">Any distance</option>
+                                                <option value="5">Within 5 km</option>
+                                                <option value="10">Within 10 km</option>
+                                                <option value="25">Within 25 km</option>
+                                                <option value="50">Within 50 km</option>
+                                            </select>
+                                        )}
                                     </div>
 
                                     {/* Skill Filter */}
@@ -576,13 +625,14 @@ const SeekerDashboard = () => {
                                     </div>
 
                                     {/* Clear Filters */}
-                                    {(filters.search || filters.skills || filters.ordering !== '-created_at') && (
+                                    {(filters.search || filters.skills || filters.radius_km || filters.ordering !== '-created_at') && (
                                         <div className="pt-3 border-t border-gray-100 flex justify-end">
                                             <button
                                                 onClick={() =>
                                                     setFilters({
                                                         search: '',
                                                         skills: '',
+                                                        radius_km: '',
                                                         ordering: '-created_at'
                                                     })
                                                 }
@@ -618,6 +668,9 @@ const SeekerDashboard = () => {
                                             </div>
                                             <div className="mt-3 flex flex-wrap gap-2 items-center">
                                                 <span className="text-[10px] bg-gray-50 text-gray-500 px-2 py-1 rounded-lg font-bold border border-gray-100 uppercase tracking-tight">📍 {job.location}</span>
+                                                {job.distance_km != null && (
+                                                    <span className="text-[10px] bg-gray-50 text-gray-500 px-2 py-1 rounded-lg font-bold border border-gray-100">{job.distance_km.toFixed(1)} km away</span>
+                                                )}
                                                 {job.address && (
                                                     <span className="text-[10px] bg-gray-50 text-gray-400 px-2 py-1 rounded-lg font-bold border border-gray-100 italic">🏠 {job.address}</span>
                                                 )}
@@ -730,7 +783,7 @@ const SeekerDashboard = () => {
                                 {hasMoreJobs && (
                                     <div className="flex justify-center mt-8">
                                         <button
-                                            onClick={() => fetchAllJobs(allJobsPage + 1)}
+                                            onClick={() => fetchAllJobs()}
                                             disabled={isLoadingJobs}
                                             className="px-8 py-3 bg-white border-2 border-gray-900 text-gray-900 rounded-2xl font-black uppercase tracking-widest text-xs hover:bg-gray-900 hover:text-white transition-all disabled:opacity-50"
                                         >